@@ -0,0 +1,102 @@
+import numpy as np
+
+# Rows scored per block while assigning programs to lists, to bound the
+# temporary (rows x lists) similarity matrix.
+ASSIGN_BLOCK_ROWS = 8192
+
+
+def _assign(matrix, centroids):
+    assignment = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), ASSIGN_BLOCK_ROWS):
+        block = matrix[start : start + ASSIGN_BLOCK_ROWS]
+        assignment[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index over L2-normalized program vectors.
+
+    Programs are clustered with spherical k-means; a query only scores the
+    programs in the ``n_probe`` lists whose centroids are closest to it.
+    ``n_probe`` is the recall/latency knob: higher probes more lists and
+    approaches the exact scan.
+    """
+
+    def __init__(self, matrix, n_lists, n_iter=10, sample_size=20000, seed=0):
+        rng = np.random.default_rng(seed)
+        n_lists = max(1, min(n_lists, len(matrix)))
+
+        sample = matrix
+        if len(matrix) > sample_size:
+            sample = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(n_iter):
+            assignment = _assign(sample, centroids)
+            order = np.argsort(assignment, kind="stable")
+            counts = np.bincount(assignment, minlength=n_lists)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            sums = np.zeros_like(centroids)
+            sums[counts > 0] = np.add.reduceat(sample[order], starts[counts > 0])
+            norms = np.linalg.norm(sums, axis=1)
+
+            # Re-seed lists that lost every member.
+            empty = norms == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+                norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms[:, None]
+
+        self._set_lists(matrix, centroids.astype(np.float32), _assign(matrix, centroids))
+
+    def _set_lists(self, matrix, centroids, assignment):
+        self.centroids = centroids
+        self.assignment = assignment
+        # CSR layout: list c holds rows order[offsets[c]:offsets[c + 1]].
+        self.order = np.argsort(assignment, kind="stable").astype(np.int64)
+        self.offsets = np.searchsorted(assignment[self.order], np.arange(len(centroids) + 1))
+        self.matrix = matrix
+
+    def patched(self, matrix, source):
+        """
+        Index over ``matrix`` after a catalog patch (see ``Catalog.patched``):
+        untouched rows keep their list, touched ones are assigned to the
+        nearest existing centroid. Centroids are not retrained; a full
+        rebuild does that.
+        """
+        assignment = np.where(source >= 0, self.assignment[np.maximum(source, 0)], 0).astype(np.int32)
+        touched = np.flatnonzero(source < 0)
+        if len(touched):
+            assignment[touched] = _assign(matrix[touched], self.centroids)
+
+        index = IVFIndex.__new__(IVFIndex)
+        index._set_lists(matrix, self.centroids, assignment)
+        return index
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def search(self, query, mask, n_probe, min_candidates):
+        """
+        Candidate rows passing ``mask`` from the closest lists, with their
+        cosine similarity to ``query``. Probing continues past ``n_probe``
+        lists until ``min_candidates`` rows survive the filters (or every
+        list was probed), so tight filters degrade to an exact scan instead
+        of returning too few programs. Rows come back in catalog order.
+        """
+        probe_order = np.argsort(-(self.centroids @ query))
+        gathered = []
+        found = 0
+        for probed, list_id in enumerate(probe_order, start=1):
+            rows = self.order[self.offsets[list_id] : self.offsets[list_id + 1]]
+            rows = rows[mask[rows]]
+            gathered.append(rows)
+            found += len(rows)
+            if probed >= n_probe and found >= min_candidates:
+                break
+
+        candidates = np.sort(np.concatenate(gathered)) if gathered else np.zeros(0, dtype=np.int64)
+        return candidates, self.matrix[candidates] @ query
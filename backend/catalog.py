@@ -0,0 +1,425 @@
+import hashlib
+import json
+import re
+import sys
+from collections import Counter
+
+import numpy as np
+
+from backend.gazetteer import resolve
+from backend.geo import haversine_km, locate
+
+# Fields every result needs; programs missing one are dropped at load time.
+REQUIRED_FIELDS = ("school", "name", "description")
+
+# The only program fields kept in memory: the row key plus what scoring and
+# filtering read. Display fields are fetched per result (see ProgramDetails).
+SCORING_FIELDS = (
+    "_id",
+    "school",
+    "category",
+    "school_type",
+    "location",
+    "tuition_per_semester",
+)
+
+# "₱25,000", "PHP 25000.50", "25000" -> 25000; anything else ("N/A", ranges, notes) is unknown
+_TUITION_TEXT = re.compile(r"(?:₱|php|p)?\s*(\d[\d,]*(?:\.\d+)?)", re.IGNORECASE)
+
+
+class Program:
+    """
+    One catalog row: the scoring fields of a program, checked and coerced
+    once at load. Categorical strings are interned, so the thousands of
+    programs sharing a school, category or location share one string.
+    """
+
+    __slots__ = (
+        "id",
+        "school",
+        "category",
+        "school_type",
+        "location",
+        "tuition_per_semester",
+    )
+
+    def __init__(self, program_id, school, category, school_type, location, tuition_per_semester):
+        self.id = program_id
+        self.school = school
+        self.category = category
+        self.school_type = school_type
+        self.location = location
+        self.tuition_per_semester = tuition_per_semester
+
+    @classmethod
+    def from_document(cls, doc):
+        """Program from a document with a string ``school``; other non-string labels become None."""
+        return cls(
+            doc.get("_id"),
+            sys.intern(doc["school"]),
+            _interned(doc.get("category")),
+            _interned(doc.get("school_type")),
+            _interned(doc.get("location")),
+            doc.get("tuition_per_semester"),
+        )
+
+    def to_document(self):
+        return {
+            "_id": self.id,
+            "school": self.school,
+            "category": self.category,
+            "school_type": self.school_type,
+            "location": self.location,
+            "tuition_per_semester": self.tuition_per_semester,
+        }
+
+    def semester_tuition(self):
+        """
+        ``tuition_per_semester`` as a number, NaN when unknown. Budget
+        filters and tuition sorting act on this value only; the annual
+        figure is a display field.
+        """
+        return parse_tuition(self.tuition_per_semester)
+
+
+class Catalog:
+    """In-memory view of ``program_vectors`` prepared for vectorized scoring.
+
+    ``entries[i]`` is the Program (scoring fields) of row ``i`` and
+    ``matrix[i]`` the matching L2-normalized float32 embedding. The filter
+    columns (school type codes, location codes, tuition) are parallel to
+    ``entries`` so request filters reduce to one boolean mask, and so are
+    ``lat``/``lng`` (offline coordinates, NaN when unknown). Known tuition
+    is also kept sorted (``tuition_order``) so budget ranges resolve by
+    binary search.
+    """
+
+    def __init__(self, entries, matrix, version=None):
+        self.entries = entries
+        self.matrix = matrix
+        self.version = version or fingerprint(
+            [entry.to_document() for entry in entries], matrix.tobytes()
+        )
+
+        self.school_type_codes, self.school_types = _encode_categories(
+            (entry.school_type or "").lower() for entry in entries
+        )
+        self.location_codes, self.locations = _encode_categories(
+            (entry.location or "").lower() for entry in entries
+        )
+        self.place_labels = _place_postings(self.locations)
+        self.tuition = np.array([entry.semester_tuition() for entry in entries], dtype=np.float64)
+        self._index_tuition()
+        self.lat, self.lng = _locate_all(entries)
+        self.rows = {entry.id: row for row, entry in enumerate(entries)}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def patched(self, delta, removed_ids=()):
+        """
+        Copy of this catalog with the programs of ``delta`` (a Catalog of
+        changed or new rows) upserted by ``_id`` and ``removed_ids`` dropped.
+        Only touched rows are re-encoded, and the matrix is shared unless a
+        vector changed. Returns ``(catalog, source)``, where ``source[i]`` is
+        the old row of new row ``i`` or -1 if that row was touched, or None
+        when nothing actually changed.
+        """
+        if len(delta) and (not len(self) or delta.matrix.shape[1] != self.matrix.shape[1]):
+            raise ValueError("Changed vectors don't match the catalog dimension")
+
+        updated = []  # (row, delta position)
+        appended = []
+        for position, entry in enumerate(delta.entries):
+            row = self.rows.get(entry.id)
+            if row is None:
+                appended.append(position)
+            elif entry.to_document() != self.entries[row].to_document() or not np.array_equal(
+                delta.matrix[position], self.matrix[row]
+            ):
+                updated.append((row, position))
+        removed = sorted({self.rows[i] for i in removed_ids if i in self.rows})
+        if not (updated or appended or removed):
+            return None
+
+        entries = list(self.entries)
+        school_types = dict(self.school_types)
+        locations = dict(self.locations)
+        school_type_codes = self.school_type_codes.copy()
+        location_codes = self.location_codes.copy()
+        tuition = self.tuition.copy()
+        lat, lng = self.lat.copy(), self.lng.copy()
+        source = np.arange(len(entries))
+
+        matrix = self.matrix
+        if any(not np.array_equal(delta.matrix[position], matrix[row]) for row, position in updated):
+            matrix = np.array(matrix)  # private copy; the old snapshot keeps its own
+        for row, position in updated:
+            entry = delta.entries[position]
+            entries[row] = entry
+            school_type_codes[row] = _label_code(school_types, entry.school_type)
+            location_codes[row] = _label_code(locations, entry.location)
+            tuition[row] = entry.semester_tuition()
+            lat[row], lng[row] = locate(entry.school, entry.location)
+            if matrix is not self.matrix:
+                matrix[row] = delta.matrix[position]
+            source[row] = -1
+
+        if appended:
+            new_entries = [delta.entries[position] for position in appended]
+            entries += new_entries
+            school_type_codes = np.concatenate(
+                [school_type_codes, [_label_code(school_types, e.school_type) for e in new_entries]]
+            ).astype(np.int32)
+            location_codes = np.concatenate(
+                [location_codes, [_label_code(locations, e.location) for e in new_entries]]
+            ).astype(np.int32)
+            tuition = np.concatenate(
+                [tuition, [e.semester_tuition() for e in new_entries]]
+            )
+            new_lat, new_lng = _locate_all(new_entries)
+            lat, lng = np.concatenate([lat, new_lat]), np.concatenate([lng, new_lng])
+            matrix = np.concatenate([matrix, delta.matrix[appended]])
+            source = np.concatenate([source, np.full(len(appended), -1)])
+
+        if removed:
+            keep = np.ones(len(entries), dtype=bool)
+            keep[removed] = False
+            entries = [entry for entry, kept in zip(entries, keep) if kept]
+            school_type_codes = school_type_codes[keep]
+            location_codes = location_codes[keep]
+            tuition = tuition[keep]
+            lat, lng = lat[keep], lng[keep]
+            matrix = matrix[keep]
+            source = source[keep]
+
+        catalog = Catalog.__new__(Catalog)
+        catalog.entries = entries
+        catalog.matrix = matrix
+        catalog.version = fingerprint(
+            self.version,
+            [delta.entries[position].to_document() for _, position in updated],
+            [delta.entries[position].to_document() for position in appended],
+            [self.entries[row].id for row in removed],
+        )
+        catalog.school_type_codes, catalog.school_types = school_type_codes, school_types
+        catalog.location_codes, catalog.locations = location_codes, locations
+        catalog.place_labels = (
+            self.place_labels
+            if len(locations) == len(self.locations)
+            else _place_postings(locations)
+        )
+        catalog.tuition = tuition
+        catalog._index_tuition()
+        catalog.lat, catalog.lng = lat, lng
+        catalog.rows = (
+            self.rows
+            if not (appended or removed)
+            else {entry.id: row for row, entry in enumerate(entries)}
+        )
+        return catalog, source
+
+    def similarities(self, query):
+        """Cosine similarity of every program against a unit-length query."""
+        if not self.entries:
+            return np.zeros(0, dtype=np.float32)
+        return self.matrix @ query
+
+    def _index_tuition(self):
+        self.tuition_known = ~np.isnan(self.tuition)
+        known = np.flatnonzero(self.tuition_known)
+        self.tuition_order = known[np.argsort(self.tuition[known], kind="stable")]
+        self.tuition_sorted = self.tuition[self.tuition_order]
+
+    def tuition_mask(self, min_budget=None, max_budget=None, include_unknown=True):
+        """Programs whose semester tuition lies in [min_budget, max_budget] (bounds optional)."""
+        low = 0 if min_budget is None else np.searchsorted(self.tuition_sorted, min_budget, "left")
+        high = (
+            len(self.tuition_sorted)
+            if max_budget is None
+            else np.searchsorted(self.tuition_sorted, max_budget, "right")
+        )
+        mask = ~self.tuition_known if include_unknown else np.zeros(len(self.entries), dtype=bool)
+        mask[self.tuition_order[low:high]] = True
+        return mask
+
+    def distances_km(self, lat, lng, rows):
+        """Distance from (lat, lng) to the programs in ``rows``; NaN where unknown."""
+        return haversine_km(self.lat[rows], self.lng[rows], lat, lng)
+
+    def filter_mask(
+        self,
+        school_type=None,
+        locations=None,
+        max_budget=None,
+        min_budget=None,
+        include_unknown_tuition=True,
+        near=None,
+    ):
+        """Boolean mask of the programs passing the request filters."""
+        mask = np.ones(len(self.entries), dtype=bool)
+
+        # 🎓 School type filter
+        if school_type and school_type.lower() != "any":
+            code = self.school_types.get(school_type.lower())
+            if code is None:
+                return np.zeros_like(mask)
+            mask &= self.school_type_codes == code
+
+        # 📍 Location filter: requested places resolve to gazetteer IDs once and
+        # mark every location label filed under one of them; blank entries
+        # don't filter, as before
+        locations = [location for location in locations or () if location and location.strip(" ,")]
+        if locations:
+            matched = np.zeros(len(self.locations), dtype=bool)
+            for place in set().union(*(resolve(location) for location in locations)):
+                matched[self.place_labels.get(place, [])] = True
+            mask &= matched[self.location_codes]
+
+        # 💰 Budget range: unknown tuition passes unless include_unknown_tuition is off
+        if min_budget is not None or max_budget is not None or not include_unknown_tuition:
+            mask &= self.tuition_mask(min_budget, max_budget, include_unknown_tuition)
+
+        # 📏 Radius filter (``near`` = (lat, lng, radius_km)), computed only over
+        # the programs still in; programs without coordinates are dropped
+        if near is not None:
+            rows = np.flatnonzero(mask)
+            mask[rows[~(self.distances_km(near[0], near[1], rows) <= near[2])]] = False
+
+        return mask
+
+
+def fingerprint(*parts):
+    """Short content hash of JSON-able values and/or bytes."""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = json.dumps(part, sort_keys=True, default=str).encode()
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _encode_categories(values):
+    """Map values to int codes; returns (codes, {label: code})."""
+    labels = {}
+    codes = [labels.setdefault(value, len(labels)) for value in values]
+    return np.array(codes, dtype=np.int32), labels
+
+
+def _place_postings(locations):
+    """Gazetteer place ID -> codes of the location labels (from ``_encode_categories``) in it."""
+    postings = {}
+    unknown = []
+    for label, code in locations.items():
+        places = resolve(label, expand=True) if label else set()
+        for place in places:
+            postings.setdefault(place, []).append(code)
+        if any(place.startswith("?") for place in places):
+            unknown.append(label)
+    if unknown:
+        print(f"📍 Locations not in the gazetteer (matched by exact name only): {', '.join(unknown)}")
+    return {place: np.array(codes, dtype=np.int64) for place, codes in postings.items()}
+
+
+def _locate_all(entries):
+    """(lat, lng) columns for ``entries``, locating each (school, location) pair once."""
+    located = {}
+    for entry in entries:
+        key = (entry.school, entry.location)
+        if key not in located:
+            located[key] = locate(entry.school, entry.location)
+    points = [located[(entry.school, entry.location)] for entry in entries]
+    coords = np.array(points, dtype=np.float64).reshape(-1, 2)
+    return coords[:, 0].copy(), coords[:, 1].copy()
+
+
+def _label_code(labels, value):
+    """Code of ``value`` in a label table from ``_encode_categories``, adding it if new."""
+    return labels.setdefault((value or "").lower(), len(labels))
+
+
+def _interned(value):
+    return sys.intern(value) if isinstance(value, str) else None
+
+
+def parse_tuition(value):
+    """Tuition as a non-negative float, or NaN when unknown ("N/A", None, free text)."""
+    if isinstance(value, bool):
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value) if 0 <= value < np.inf else np.nan
+    if isinstance(value, str):
+        match = _TUITION_TEXT.fullmatch(value.strip())
+        if match:
+            return float(match.group(1).replace(",", ""))
+    return np.nan
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0  # zero vectors stay zero -> similarity 0
+    matrix /= norms
+    return matrix
+
+
+def build_catalog(program_data, codec=None, required=REQUIRED_FIELDS):
+    """
+    Build a Catalog from ``program_vectors`` documents. Without a ``codec``
+    each document carries its vector as a ``vector`` list of floats; with
+    one, as a compact binary payload in ``codec.field``. Documents lacking
+    a string in one of the ``required`` fields, or a usable vector, are
+    skipped and reported in one summary line.
+    """
+    vector_field = codec.field if codec else "vector"
+    entries = []
+    vectors = []
+    skipped = Counter()
+    dimension = None
+
+    for doc in program_data:
+        missing = [field for field in required if not isinstance(doc.get(field), str)]
+        if missing:
+            skipped[f"missing {', '.join(missing)}"] += 1
+            continue
+
+        vector = doc.get(vector_field)
+        if codec:
+            valid = isinstance(vector, bytes) and len(vector) == codec.row_bytes
+        else:
+            if dimension is None and isinstance(vector, list) and vector:
+                dimension = len(vector)
+            valid = isinstance(vector, list) and len(vector) == dimension
+        if not valid:
+            skipped[f"invalid {vector_field}"] += 1
+            continue
+
+        entries.append(Program.from_document(doc))
+        vectors.append(vector)
+
+    if codec:
+        matrix = codec.decode(vectors) if vectors else None
+    else:
+        # One contiguous block so a whole catalog scores in a single mat-vec.
+        try:
+            matrix = np.array(vectors, dtype=np.float32) if vectors else None
+        except (TypeError, ValueError):
+            keep = [row for row, vector in enumerate(vectors) if _is_numeric(vector)]
+            skipped[f"non-numeric {vector_field}"] += len(vectors) - len(keep)
+            entries = [entries[row] for row in keep]
+            matrix = np.array([vectors[row] for row in keep], dtype=np.float32) if keep else None
+
+    if skipped:
+        details = ", ".join(f"{count} {reason}" for reason, count in skipped.items())
+        print(f"⚠️ Skipped {sum(skipped.values())} invalid programs ({details})")
+
+    if matrix is None:
+        return Catalog(entries, np.zeros((0, 0), dtype=np.float32))
+    return Catalog(entries, _normalize_rows(matrix))
+
+
+def _is_numeric(vector):
+    try:
+        np.asarray(vector, dtype=np.float32)
+    except (TypeError, ValueError):
+        return False
+    return True
@@ -0,0 +1,161 @@
+import threading
+import time
+
+
+class CatalogSnapshot:
+    """
+    Immutable, versioned view of everything a search reads: the catalog
+    (vectors, filter columns, metadata), rankings, per-program rating prior
+    and the optional ANN index. A search grabs one snapshot up front and
+    uses only it, so a reload never changes data under a running request.
+
+    ``source_fingerprint`` is the ``probe()`` value the data was read at,
+    when known (snapshots booted from a local export record it).
+    """
+
+    def __init__(
+        self, catalog, rankings_data, rating_table, rating_prior, ann_index, version,
+        source_fingerprint=None,
+    ):
+        self.catalog = catalog
+        self.rankings_data = rankings_data
+        self.rating_table = rating_table
+        self.rating_prior = rating_prior
+        self.ann_index = ann_index
+        self.version = version
+        self.source_fingerprint = source_fingerprint
+        self.loaded_at = time.time()
+
+
+class CatalogManager:
+    """
+    Holds the current CatalogSnapshot and replaces it atomically.
+
+    ``build()`` loads a complete new snapshot; ``probe()`` returns a cheap
+    fingerprint of the source data used by polling to decide whether a
+    rebuild is needed. ``initial()``, if given, is tried for the first
+    snapshot only (e.g. a local file) and may return None to fall back to
+    ``build()``. Builds are serialized; readers never block on them once the
+    first snapshot exists.
+    """
+
+    def __init__(self, build, probe=None, initial=None):
+        self._build = build
+        self._probe = probe
+        self._initial = initial
+        self._snapshot = None
+        self._lock = threading.Lock()  # serializes builds
+        self._thread_lock = threading.Lock()
+        self._reload_thread = None
+        self.reloads = 0
+        self.patches = 0
+        self.last_error = None
+
+    def current(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._load(first=True)
+            snapshot = self._snapshot
+        return snapshot
+
+    def peek(self):
+        """The current snapshot without loading one (None before the first load)."""
+        return self._snapshot
+
+    def _load(self, first=False):
+        snapshot = self._initial() if first and self._initial else None
+        if snapshot is None:
+            snapshot = self._build()
+        if self._snapshot is not None and snapshot.version == self._snapshot.version:
+            return False
+
+        self._snapshot = snapshot  # single reference assignment = atomic swap
+        self.reloads += 1
+        print(f"📚 Catalog version {snapshot.version} live ({len(snapshot.catalog)} programs)")
+        return True
+
+    def reload(self):
+        """Build a fresh snapshot and swap it in; False if nothing changed."""
+        with self._lock:
+            return self._load()
+
+    def patch(self, update):
+        """
+        Swap in ``update(snapshot)``, a snapshot derived from the current one
+        (e.g. with a few rows changed); False if it returns None. Serialized
+        with builds, so a patch never races a full reload.
+        """
+        self.current()  # a patch always applies on top of a loaded snapshot
+        with self._lock:
+            snapshot = update(self._snapshot)
+            if snapshot is None or snapshot.version == self._snapshot.version:
+                return False
+            self._snapshot = snapshot
+            self.patches += 1
+            print(f"🩹 Catalog patched to version {snapshot.version} ({len(snapshot.catalog)} programs)")
+            return True
+
+    def request_reload(self):
+        """Start ``reload()`` in the background; False if one is already running."""
+        with self._thread_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            self._reload_thread = threading.Thread(
+                target=self._reload_logged, name="catalog-reload", daemon=True
+            )
+            self._reload_thread.start()
+            return True
+
+    def _reload_logged(self):
+        try:
+            self.reload()
+            self.last_error = None
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"❌ Catalog reload failed, keeping version {self.version}: {e}")
+            return False
+
+    def start_polling(self, interval):
+        """Rebuild whenever ``probe()`` changes, checking every ``interval`` seconds."""
+        if not self._probe or interval <= 0:
+            return
+
+        def poll():
+            baseline = None
+            while True:
+                try:
+                    value = self._probe()
+                    if baseline is None:
+                        # A snapshot booted from a local export is compared
+                        # with the source state it was exported at, so edits
+                        # made since then trigger a reload right away.
+                        baseline = self.current().source_fingerprint or value
+                except Exception as e:
+                    print(f"⚠️ Catalog poll failed: {e}")
+                else:
+                    # Probed before the rebuild, so a change landing during
+                    # it is still caught on the next round.
+                    if value != baseline and self._reload_logged():
+                        baseline = value
+                time.sleep(interval)
+
+        threading.Thread(target=poll, name="catalog-poll", daemon=True).start()
+
+    @property
+    def version(self):
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            "version": self.version,
+            "programs": len(snapshot.catalog) if snapshot else 0,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "reloads": self.reloads,
+            "patches": self.patches,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,185 @@
+import threading
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+# Stream events that only touch one document; anything else (drop, rename,
+# invalidate, ...) marks the whole collection as changed.
+DOCUMENT_EVENTS = {"insert", "update", "replace", "delete"}
+
+
+class CatalogSync:
+    """
+    Follows inserts, updates and deletes on ``collections`` and passes them
+    in batches to ``apply({collection: ids})``, where ``ids`` is the set of
+    changed ``_id`` values or None when the whole collection changed.
+
+    ``mode`` "stream" uses MongoDB change streams (replica sets only),
+    "poll" checks every ``interval`` seconds for documents whose
+    ``updated_at`` moved on and for added or removed ``_id`` values, which
+    also works on a standalone server, and "auto" tries the stream first and
+    falls back to polling. Writers must bump ``updated_at`` for polling to
+    see in-place edits.
+    """
+
+    def __init__(self, db, collections, apply, mode="auto", interval=5.0):
+        self._db = db
+        self.collections = tuple(collections)
+        self._apply = apply
+        self.mode = mode
+        self.interval = interval
+        self.source = None  # "stream" or "poll" once running
+        self.events = 0
+        self.batches = 0
+        self.last_error = None
+        self._pending = {}
+
+    def start(self):
+        threading.Thread(target=self._run, name="catalog-sync", daemon=True).start()
+
+    def _run(self):
+        try:
+            if self.mode in ("auto", "stream"):
+                try:
+                    self._follow_stream()
+                except Exception as e:  # standalone server, or a stand-in without watch()
+                    if self.mode == "stream":
+                        self.last_error = str(e)
+                        print(f"❌ Catalog change stream unavailable: {e}")
+                        return
+                    print(f"⚠️ Change streams unavailable ({e}), polling updated_at every {self.interval}s")
+            self._poll()
+        except Exception as e:
+            self.source = None  # not following anything any more
+            self.last_error = str(e)
+            print(f"❌ Catalog sync stopped: {e}")
+
+    def _follow_stream(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+        resume_token = None
+        opened = False
+        while True:
+            try:
+                with self._db.watch(
+                    pipeline, resume_after=resume_token, max_await_time_ms=500
+                ) as stream:
+                    opened = True
+                    self.source = "stream"
+                    while stream.alive:
+                        change = stream.try_next()
+                        if change is not None:
+                            self._collect(change)
+                            if change["operationType"] == "invalidate":
+                                resume_token = None
+                                break
+                            continue
+                        # Quiet for a moment: everything seen so far is one batch
+                        if self._flush():
+                            resume_token = stream.resume_token
+            except OperationFailure as e:
+                if not opened:
+                    raise
+                # The stream can't resume (e.g. history lost): start a new one
+                # and treat everything as changed, since events may be missing.
+                self.last_error = str(e)
+                print(f"⚠️ Catalog change stream lost ({e}), reloading everything")
+                self._pending = {name: None for name in self.collections}
+                resume_token = None
+                time.sleep(self.interval)
+            except PyMongoError as e:
+                self.last_error = str(e)
+                print(f"⚠️ Catalog change stream interrupted: {e}")
+                time.sleep(self.interval)
+
+    def _collect(self, change):
+        self.events += 1
+        collection = change.get("ns", {}).get("coll")
+        names = [collection] if collection else self.collections
+        for name in names:
+            if change["operationType"] in DOCUMENT_EVENTS:
+                ids = self._pending.setdefault(name, set())
+                if ids is not None:
+                    ids.add(change["documentKey"]["_id"])
+            else:
+                self._pending[name] = None
+
+    def _poll(self):
+        self.source = "poll"
+        state = {}
+        while True:
+            try:
+                for name in self.collections:
+                    if name not in state:
+                        state[name] = self._poll_state(name)  # baseline, nothing to apply
+                        continue
+                    state[name], changed = self._poll_collection(name, *state[name])
+                    if changed:
+                        self.events += len(changed)
+                        ids = self._pending.setdefault(name, set())
+                        if ids is not None:
+                            ids.update(changed)
+                self._flush()
+            except PyMongoError as e:
+                self.last_error = str(e)
+                print(f"⚠️ Catalog sync poll failed: {e}")
+            time.sleep(self.interval)
+
+    def _poll_state(self, name):
+        collection = self._db[name]
+        ids = {doc["_id"] for doc in collection.find({}, {"_id": 1})}
+        latest = collection.find_one(
+            {"updated_at": {"$exists": True}}, {"updated_at": 1}, sort=[("updated_at", -1)]
+        )
+        watermark = latest["updated_at"] if latest else None
+        at_watermark = (
+            {doc["_id"] for doc in collection.find({"updated_at": watermark}, {"_id": 1})}
+            if latest
+            else set()
+        )
+        return watermark, at_watermark, ids
+
+    def _poll_collection(self, name, watermark, at_watermark, ids):
+        """(new state, changed ids) since ``watermark`` / the last ``_id`` set."""
+        collection = self._db[name]
+        current_ids = {doc["_id"] for doc in collection.find({}, {"_id": 1})}
+        query = {"updated_at": {"$gte": watermark} if watermark is not None else {"$exists": True}}
+        touched = [
+            doc
+            for doc in collection.find(query, {"_id": 1, "updated_at": 1})
+            if not (doc["updated_at"] == watermark and doc["_id"] in at_watermark)
+        ]
+
+        if touched:
+            latest = max(doc["updated_at"] for doc in touched)
+            if latest != watermark:
+                at_watermark = set()
+                watermark = latest
+            at_watermark |= {doc["_id"] for doc in touched if doc["updated_at"] == watermark}
+
+        changed = (current_ids ^ ids) | {doc["_id"] for doc in touched}
+        return (watermark, at_watermark, current_ids), changed
+
+    def _flush(self):
+        """Apply pending changes; they stay pending (and are retried) if that fails."""
+        if not self._pending:
+            return True
+        try:
+            self._apply(self._pending)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"❌ Applying catalog changes failed, will retry: {e}")
+            return False
+        self._pending = {}
+        self.batches += 1
+        self.last_error = None
+        return True
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "source": self.source,
+            "events": self.events,
+            "batches": self.batches,
+            "pending_collections": len(self._pending),
+            "last_error": self.last_error,
+        }
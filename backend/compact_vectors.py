@@ -0,0 +1,59 @@
+"""
+Write compact binary copies of the program vectors.
+
+Usage: python -m backend.compact_vectors [float16|int8]
+
+Reads the ``vector`` float lists from ``program_vectors``, stores each one
+L2-normalized as a binary payload (``vector_f16`` / ``vector_i8``) next to
+it and the codec parameters in ``program_vector_meta``. Start the API with
+``VECTOR_STORAGE=<mode>`` to load only the compact payloads.
+"""
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+from pymongo import UpdateOne
+
+from backend.db import db
+from backend.vector_codec import STORAGE_FIELDS, VectorCodec
+
+
+def compact_vectors(storage):
+    collection = db["program_vectors"]
+    docs = list(collection.find({"vector": {"$exists": True}}, {"_id": 1, "vector": 1}))
+    if not docs:
+        print("No program vectors to compact.")
+        return
+
+    matrix = np.array([doc["vector"] for doc in docs], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+
+    codec = VectorCodec.fit(storage, matrix)
+    payloads = codec.encode(matrix)
+
+    # updated_at lets catalog sync (CATALOG_SYNC=poll) pick the change up
+    now = datetime.now(timezone.utc)
+    collection.bulk_write(
+        [
+            UpdateOne({"_id": doc["_id"]}, {"$set": {codec.field: payload, "updated_at": now}})
+            for doc, payload in zip(docs, payloads)
+        ]
+    )
+    db["program_vector_meta"].replace_one(
+        {"_id": storage}, {**codec.to_document(), "updated_at": now}, upsert=True
+    )
+
+    error = np.abs(codec.decode(payloads) - matrix).max()
+    print(
+        f"Stored {len(payloads)} {storage} vectors in '{codec.field}' "
+        f"({codec.row_bytes} bytes each, max abs error {error:.5f})."
+    )
+
+
+if __name__ == "__main__":
+    storage = sys.argv[1] if len(sys.argv) > 1 else "int8"
+    if storage not in STORAGE_FIELDS:
+        sys.exit(f"Usage: python -m backend.compact_vectors [{'|'.join(STORAGE_FIELDS)}]")
+    compact_vectors(storage)
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from backend.embedding_batcher import EmbeddingBatcher
+from backend.embedding_cache import EmbeddingCache, normalize_text
+from backend.lazy import once
+from backend.questionnaire import all_choices
+
+MODEL_NAME = "all-mpnet-base-v2"
+
+# ⚙️ Inference backend: "torch" (default) or "onnx" (ONNX Runtime on CPU). An
+# exported/quantized model from `python -m backend.export_onnx` is selected with
+# ONNX_MODEL_PATH and ONNX_MODEL_FILE (e.g. onnx/model_qint8_avx512_vnni.onnx)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "")
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "")
+
+# 🧠 Embedding cache in front of model.encode (0 MB disables it); set a SQLite
+# path to share encodings between workers on one node
+EMBEDDING_CACHE_MB = float(os.getenv("EMBEDDING_CACHE_MB", "32"))
+EMBEDDING_CACHE_TTL = int(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+
+# 📦 Micro-batching of encodes from concurrent searches (max size 0 disables it)
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "2"))
+
+
+@once
+def get_model():
+    return load_model(EMBEDDING_BACKEND, ONNX_MODEL_PATH, ONNX_MODEL_FILE)
+
+
+def load_model(backend="torch", path="", file_name=""):
+    if backend == "onnx":
+        # Needs `pip install optimum[onnxruntime]`; without a file name the
+        # model's default onnx/model.onnx is used (exported on first load).
+        model_kwargs = {"file_name": file_name} if file_name else None
+        return SentenceTransformer(path or MODEL_NAME, backend="onnx", model_kwargs=model_kwargs)
+    return SentenceTransformer(MODEL_NAME)
+
+
+@once
+def get_embedding_cache():
+    if EMBEDDING_CACHE_MB <= 0:
+        return None
+    return EmbeddingCache(
+        int(EMBEDDING_CACHE_MB * 1024 * 1024),
+        ttl=EMBEDDING_CACHE_TTL,
+        disk_path=EMBEDDING_CACHE_PATH or None,
+    )
+
+
+@once
+def get_embedding_batcher():
+    if EMBEDDING_BATCH_MAX_SIZE <= 0:
+        return None
+    return EmbeddingBatcher(
+        get_model().encode, EMBEDDING_BATCH_MAX_SIZE, EMBEDDING_BATCH_MAX_WAIT_MS
+    )
+
+
+def _encode(model, texts):
+    if not texts:
+        return []
+    batcher = get_embedding_batcher()
+    return batcher.encode(texts) if batcher else model.encode(texts)
+
+
+def encode_texts(model, texts):
+    """
+    ``model.encode`` for a list of texts behind the embedding cache. Texts
+    are normalized (case, whitespace) first; only distinct cache misses
+    reach the model, in one batch shared with concurrent searches.
+    """
+    cache = get_embedding_cache()
+    if cache is None:
+        return _encode(model, texts)
+
+    keys = [normalize_text(text) for text in texts]
+    found = cache.get_many(list(dict.fromkeys(keys)))
+    misses = [key for key in dict.fromkeys(keys) if key not in found]
+    if misses:
+        fresh = dict(zip(misses, _encode(model, misses)))
+        cache.put_many(fresh)
+        found.update(fresh)
+    return [found[key] for key in keys]
+
+
+@once
+def get_choice_embeddings():
+    """Embedding of every fixed questionnaire choice, encoded once in one batch."""
+    choices = all_choices()
+    return dict(zip(choices, get_model().encode(choices)))
+
+
+def check_parity(candidate, reference, texts):
+    """Cosine similarity between two models' embeddings of each text."""
+    a = np.asarray(candidate.encode(texts), dtype=np.float32)
+    b = np.asarray(reference.encode(texts), dtype=np.float32)
+    return np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
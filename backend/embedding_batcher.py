@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class EmbeddingBatcher:
+    """
+    Collects encode requests from concurrent searches and runs them through
+    the model as one batch on a single worker thread.
+
+    The worker takes whatever is queued as soon as the model is free; only
+    when more than one request is waiting does it wait up to
+    ``max_wait_ms`` for more, until ``max_batch`` texts are gathered. Under
+    light load a request is encoded right away; under heavy load requests
+    arriving during one forward pass share the next.
+    """
+
+    def __init__(self, encode, max_batch=64, max_wait_ms=2.0):
+        self._encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def encode(self, texts):
+        """Embeddings of ``texts``; blocks until their batch is encoded."""
+        if not texts:
+            return []
+        future = Future()
+        self._queue.put((list(texts), future))
+        return future.result()
+
+    def _collect(self):
+        jobs = [self._queue.get()]
+        size = len(jobs[0][0])
+        if self._queue.empty():
+            return jobs  # a lone request is encoded right away
+        # Others queued up while the model was busy: gather them, waiting at
+        # most max_wait for stragglers of the same burst
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            jobs.append(job)
+            size += len(job[0])
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = self._collect()
+            texts = [text for job_texts, _ in jobs for text in job_texts]
+            try:
+                encoded = self._encode(texts)
+            except Exception as e:
+                for _, future in jobs:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.texts += len(texts)
+            start = 0
+            for job_texts, future in jobs:
+                future.set_result(encoded[start : start + len(job_texts)])
+                start += len(job_texts)
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch_size": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "queued": self._queue.qsize(),
+        }
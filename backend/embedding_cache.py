@@ -0,0 +1,145 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Rough per-entry bookkeeping cost (dict slot, key object, tuple) on top of
+# the key text and vector bytes, used for the memory budget.
+ENTRY_OVERHEAD_BYTES = 200
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Cache key for ``text``: case-folded with whitespace collapsed."""
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class EmbeddingCache:
+    """
+    Bounded LRU + TTL cache of text embeddings, keyed on normalized text.
+
+    ``max_bytes`` bounds the in-process copy; ``ttl`` (seconds, 0 = never)
+    expires entries. With ``disk_path`` a SQLite file backs the memory tier
+    so uvicorn workers on one node share encodings.
+    """
+
+    def __init__(self, max_bytes, ttl=0, disk_path=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (vector, stored_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, timeout=5, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB, stored_at REAL)"
+            )
+            self._disk.commit()
+
+    def _expired(self, stored_at, now):
+        return self.ttl and now - stored_at > self.ttl
+
+    def get_many(self, keys):
+        """Cached vectors for the normalized ``keys`` that are present."""
+        found = {}
+        missing = []
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                cached = self._entries.get(key)
+                if cached and not self._expired(cached[1], now):
+                    self._entries.move_to_end(key)
+                    found[key] = cached[0]
+                    self.hits += 1
+                else:
+                    if cached:
+                        self._evict(key)
+                    missing.append(key)
+
+        from_disk = {}
+        if missing and self._disk is not None:
+            from_disk = self._read_disk(missing, now)
+            for key, (vector, stored_at) in from_disk.items():
+                found[key] = vector
+                self._remember(key, vector, stored_at)
+
+        with self._lock:
+            self.disk_hits += len(from_disk)
+            self.misses += len(missing) - len(from_disk)
+        return found
+
+    def put_many(self, items):
+        """Store ``{normalized key: vector}``."""
+        now = time.time()
+        for key, vector in items.items():
+            self._remember(key, vector, now)
+        if self._disk is not None and items:
+            with self._lock:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                    [
+                        (key, np.asarray(vector, dtype="<f4").tobytes(), now)
+                        for key, vector in items.items()
+                    ],
+                )
+                if self.ttl:
+                    # Expired rows are dropped on write so the shared file stays bounded.
+                    self._disk.execute(
+                        "DELETE FROM embeddings WHERE stored_at < ?", (now - self.ttl,)
+                    )
+                self._disk.commit()
+
+    def _read_disk(self, keys, now):
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._disk.execute(
+                f"SELECT key, vector, stored_at FROM embeddings WHERE key IN ({placeholders})",
+                keys,
+            ).fetchall()
+        return {
+            key: (np.frombuffer(blob, dtype="<f4"), stored_at)
+            for key, blob, stored_at in rows
+            if not self._expired(stored_at, now)
+        }
+
+    def _remember(self, key, vector, stored_at):
+        size = vector.nbytes + len(key) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key)
+            self._entries[key] = (vector, stored_at, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _evict(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
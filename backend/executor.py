@@ -0,0 +1,54 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorBusy(Exception):
+    """Raised when the executor already holds its maximum number of jobs."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool for CPU-bound work called from async endpoints.
+
+    At most ``max_workers`` jobs run at once and at most ``max_pending`` are
+    admitted in total (running + queued); beyond that ``run`` raises
+    ExecutorBusy right away instead of letting the queue grow. NumPy and
+    the model release the GIL, so threads overlap well and share one model.
+    """
+
+    def __init__(self, max_workers, max_pending, name="worker"):
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+
+    async def run(self, func, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise ExecutorBusy(f"{self._pending} jobs already pending")
+            self._pending += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,67 @@
+"""
+Export the sentence model to ONNX for EMBEDDING_BACKEND=onnx.
+
+Usage: python -m backend.export_onnx OUTPUT_DIR [--quantize avx2|avx512|avx512_vnni|arm64]
+
+Saves the ONNX graph (plus tokenizer and pooling config) to OUTPUT_DIR,
+optionally a dynamically int8-quantized copy next to it, and checks every
+exported graph against the PyTorch embeddings of the questionnaire choices.
+Then start the API with ONNX_MODEL_PATH=OUTPUT_DIR and, for the quantized
+graph, the ONNX_MODEL_FILE printed below.
+"""
+import argparse
+import sys
+
+from sentence_transformers import export_dynamic_quantized_onnx_model
+
+from backend.embedding import check_parity, load_model
+from backend.questionnaire import all_choices
+
+# Free-text answers in the style students type into the "custom" fields.
+PARITY_SAMPLES = [
+    "I want to help people and work in a hospital",
+    "building robots and programming games",
+    "teaching kids in my hometown",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("output_dir")
+    parser.add_argument("--quantize", choices=["avx2", "avx512", "avx512_vnni", "arm64"])
+    parser.add_argument(
+        "--min-similarity",
+        type=float,
+        default=0.99,
+        help="fail when any sample's cosine similarity to the torch embedding is lower",
+    )
+    args = parser.parse_args()
+
+    model = load_model("onnx")
+    model.save_pretrained(args.output_dir)
+    graphs = ["onnx/model.onnx"]
+
+    if args.quantize:
+        export_dynamic_quantized_onnx_model(
+            model, quantization_config=args.quantize, model_name_or_path=args.output_dir
+        )
+        graphs.append(f"onnx/model_qint8_{args.quantize}.onnx")
+
+    reference = load_model("torch")
+    texts = all_choices() + PARITY_SAMPLES
+    passed = True
+    for file_name in graphs:
+        similarity = check_parity(load_model("onnx", args.output_dir, file_name), reference, texts)
+        ok = similarity.min() >= args.min_similarity
+        passed &= ok
+        print(
+            f"{'✅' if ok else '❌'} ONNX_MODEL_FILE={file_name}: cosine vs torch "
+            f"min {similarity.min():.5f}, mean {similarity.mean():.5f}"
+        )
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
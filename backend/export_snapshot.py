@@ -0,0 +1,33 @@
+"""
+Export the catalog to a local binary snapshot.
+
+Usage: python -m backend.export_snapshot [directory]
+
+Writes the normalized program vectors (``vectors.npy``) and the scoring and
+ranking fields (``metadata.json.gz``, columnar) to a new ``data-*``
+subdirectory of ``directory`` (default: ``CATALOG_SNAPSHOT_DIR``), then
+points ``manifest.json`` at it. Workers started with the
+same ``CATALOG_SNAPSHOT_DIR`` boot from it instead of pulling every vector
+from MongoDB. Re-run it after changing the catalog.
+"""
+import sys
+
+from backend.recommendation import (
+    CATALOG_SNAPSHOT_DIR,
+    load_catalog,
+    load_rankings_data,
+    probe_catalog,
+)
+from backend.snapshot_store import export_snapshot
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else CATALOG_SNAPSHOT_DIR
+    if not directory:
+        sys.exit("Usage: python -m backend.export_snapshot [directory] (or set CATALOG_SNAPSHOT_DIR)")
+
+    # Probed before reading, so a change landing mid-export marks the
+    # snapshot as stale rather than being silently missed.
+    source_fingerprint = probe_catalog()
+    catalog = load_catalog()
+    manifest = export_snapshot(directory, catalog, load_rankings_data(), source_fingerprint)
+    print(f"Exported {manifest['programs']} programs to {directory} (version {manifest['catalog_version']}).")
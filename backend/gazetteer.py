@@ -0,0 +1,181 @@
+import re
+
+# Offline gazetteer of the provinces the catalog covers and their cities and
+# municipalities. Place IDs look like "pampanga" (province) or
+# "pampanga:san_fernando" (city/municipality).
+PROVINCES = {
+    "pampanga": "Pampanga",
+    "bulacan": "Bulacan",
+}
+
+# Approximate province centres, used when a location names no known town
+PROVINCE_COORDS = {
+    "pampanga": (15.0794, 120.6200),
+    "bulacan": (14.9968, 120.9090),
+}
+
+# Province -> {city/municipality: approximate town-centre (lat, lng)}
+PLACES = {
+    "pampanga": {
+        "Angeles City": (15.1450, 120.5887),
+        "Apalit": (14.9496, 120.7587),
+        "Arayat": (15.1500, 120.7697),
+        "Bacolor": (14.9983, 120.6525),
+        "Candaba": (15.0933, 120.8283),
+        "Clark Freeport": (15.1850, 120.5460),
+        "Floridablanca": (14.9740, 120.5280),
+        "Guagua": (14.9658, 120.6336),
+        "Lubao": (14.9397, 120.6017),
+        "Mabalacat City": (15.2230, 120.5740),
+        "Macabebe": (14.9083, 120.7156),
+        "Magalang": (15.2147, 120.6611),
+        "Masantol": (14.8964, 120.7094),
+        "Mexico": (15.0647, 120.7197),
+        "Minalin": (14.9686, 120.6819),
+        "Porac": (15.0719, 120.5419),
+        "San Fernando City": (15.0286, 120.6939),
+        "San Luis": (15.0397, 120.7919),
+        "San Simon": (14.9983, 120.7800),
+        "Santa Ana": (15.0950, 120.7672),
+        "Santa Rita": (14.9953, 120.6153),
+        "Santo Tomas": (14.9950, 120.7090),
+        "Sasmuan": (14.9389, 120.6236),
+    },
+    "bulacan": {
+        "Angat": (14.9289, 121.0292),
+        "Balagtas": (14.8147, 120.9083),
+        "Baliuag City": (14.9547, 120.8970),
+        "Bocaue": (14.7983, 120.9261),
+        "Bulakan": (14.7928, 120.8792),
+        "Bustos": (14.9572, 120.9175),
+        "Calumpit": (14.9167, 120.7667),
+        "Doña Remedios Trinidad": (15.0000, 121.0833),
+        "Guiguinto": (14.8333, 120.8833),
+        "Hagonoy": (14.8333, 120.7333),
+        "Malolos City": (14.8433, 120.8114),
+        "Marilao": (14.7578, 120.9481),
+        "Meycauayan City": (14.7369, 120.9608),
+        "Norzagaray": (14.9167, 121.0500),
+        "Obando": (14.7000, 120.9333),
+        "Pandi": (14.8667, 120.9500),
+        "Paombong": (14.8311, 120.7892),
+        "Plaridel": (14.8869, 120.8569),
+        "Pulilan": (14.9022, 120.8489),
+        "San Ildefonso": (15.0789, 120.9419),
+        "San Jose del Monte City": (14.8139, 121.0453),
+        "San Miguel": (15.1458, 120.9783),
+        "San Rafael": (14.9833, 120.9667),
+        "Santa Maria": (14.8194, 120.9603),
+    },
+}
+
+# Places inside another place: a program there is also in the parent, so
+# "Mabalacat" still finds programs at "Clark Freeport, Mabalacat City".
+PARENTS = {
+    "pampanga:clark_freeport": "pampanga:mabalacat",
+}
+
+# Extra spellings (after normalization) -> place ID
+ALIASES = {
+    "clark": "pampanga:clark_freeport",
+    "clark freeport zone": "pampanga:clark_freeport",
+    "csfp": "pampanga:san_fernando",
+    "baliwag": "bulacan:baliuag",
+    "sjdm": "bulacan:san_jose_del_monte",
+    "drt": "bulacan:dona_remedios_trinidad",
+}
+
+# Parts that say nothing about where in the catalog's provinces a place is
+IGNORED_PARTS = {"philippines", "ph", "central luzon", "region iii", "region 3"}
+
+_WHITESPACE = re.compile(r"\s+")
+_ABBREVIATIONS = {"sto": "santo", "sta": "santa"}
+
+
+def normalize_place(text):
+    """Lookup form of a place name: case-folded, no dots or city prefix/suffix."""
+    text = _WHITESPACE.sub(" ", text.replace(".", " ")).strip().casefold()
+    text = text.replace("ñ", "n")
+    if text.startswith("city of "):
+        text = text[len("city of ") :]
+    if text.endswith(" city"):
+        text = text[: -len(" city")]
+    words = text.split(" ")
+    words[0] = _ABBREVIATIONS.get(words[0], words[0])
+    return " ".join(words)
+
+
+def _place_id(province, name):
+    return f"{province}:{normalize_place(name).replace(' ', '_')}"
+
+
+def _build_names():
+    names = {}
+    coords = dict(PROVINCE_COORDS)
+    for province, places in PLACES.items():
+        for name, lat_lng in places.items():
+            place = _place_id(province, name)
+            names.setdefault(normalize_place(name), []).append(place)
+            coords[place] = lat_lng
+    for alias, place in ALIASES.items():
+        names.setdefault(alias, []).append(place)
+    return names, coords
+
+
+_NAMES, _COORDS = _build_names()
+_PROVINCE_NAMES = {normalize_place(name): province for province, name in PROVINCES.items()}
+
+
+def resolve(text, expand=False):
+    """
+    Place IDs for a location string like "Angeles City, Pampanga".
+
+    Comma-separated parts are looked up separately; a province part narrows
+    ambiguous names to that province. Without ``expand`` only the most
+    specific places are returned (what a search for ``text`` should match);
+    with it their parents and provinces are added too (everything a program
+    at ``text`` is in). Parts not in the gazetteer become "?<name>" IDs, so
+    they still match the exact same name and nothing else. A trailing part
+    that is neither a place nor a province is a province outside the
+    gazetteer: "San Fernando, La Union" becomes "?la_union:san_fernando"
+    (in "?la_union"), never Pampanga's San Fernando.
+    """
+    parts = [normalize_place(part) for part in text.split(",") if part.strip()]
+    parts = [part for part in parts if part not in IGNORED_PARTS]
+
+    if len(parts) > 1 and parts[-1] not in _NAMES and parts[-1] not in _PROVINCE_NAMES:
+        outside = f"?{parts.pop().replace(' ', '_')}"
+        places = {f"{outside}:{part.replace(' ', '_')}" for part in parts}
+        return places | {outside} if expand else places
+
+    provinces = {_PROVINCE_NAMES[part] for part in parts if part in _PROVINCE_NAMES}
+
+    places = set()
+    for part in parts:
+        if part in _PROVINCE_NAMES:
+            continue
+        candidates = _NAMES.get(part)
+        if not candidates:
+            places.add(f"?{part.replace(' ', '_')}")
+            continue
+        in_province = [place for place in candidates if place.split(":")[0] in provinces]
+        places.update(in_province or candidates)
+
+    if not expand:
+        # "Clark Freeport, Mabalacat City" means Clark, not all of Mabalacat
+        places -= {PARENTS.get(place) for place in places}
+        return places or provinces
+
+    expanded = set(provinces)
+    for place in places:
+        while place:
+            expanded.add(place)
+            if not place.startswith("?"):
+                expanded.add(place.split(":")[0])
+            place = PARENTS.get(place)
+    return expanded
+
+
+def place_coords(place):
+    """Approximate (lat, lng) of a place ID, or None."""
+    return _COORDS.get(place)
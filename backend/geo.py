@@ -0,0 +1,63 @@
+import json
+import os
+
+import numpy as np
+
+from backend.gazetteer import place_coords, resolve
+from backend.lazy import once
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Bundled school details (also served by /api/school-strengths); their
+# "coords" pin programs to the campus instead of the town centre.
+SCHOOL_COORDS_PATH = os.path.join(os.path.dirname(__file__), "school_strengths.json")
+
+
+@once
+def get_school_coords():
+    """Case-folded school name -> (lat, lng) from the bundled school table."""
+    try:
+        with open(SCHOOL_COORDS_PATH, encoding="utf-8") as f:
+            schools = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No school coordinates loaded ({e}); using town centres")
+        return {}
+
+    coords = {}
+    for name, info in schools.items():
+        point = info.get("coords") or {}
+        if isinstance(point.get("lat"), (int, float)) and isinstance(point.get("lng"), (int, float)):
+            coords[name.casefold()] = (float(point["lat"]), float(point["lng"]))
+    return coords
+
+
+def locate(school, location):
+    """
+    Offline (lat, lng) of a program: its school's campus if the school
+    table has it, else the centre of its town (or province) from the
+    gazetteer, else (NaN, NaN).
+    """
+    point = get_school_coords().get(school.casefold()) if school else None
+    if point:
+        return point
+
+    if location:
+        places = resolve(location)
+        # Most specific first: the named towns, then towns they lie in, then provinces
+        broader = sorted(resolve(location, expand=True) - places, key=lambda place: (":" not in place, place))
+        for place in sorted(places) + broader:
+            point = place_coords(place)
+            if point:
+                return point
+    return np.nan, np.nan
+
+
+def haversine_km(lat, lng, origin_lat, origin_lng):
+    """Great-circle distance in km from one origin to arrays of points (degrees)."""
+    lat, lng = np.radians(lat), np.radians(lng)
+    origin_lat, origin_lng = np.radians(origin_lat), np.radians(origin_lng)
+    a = (
+        np.sin((lat - origin_lat) / 2) ** 2
+        + np.cos(lat) * np.cos(origin_lat) * np.sin((lng - origin_lng) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -0,0 +1,32 @@
+import functools
+import threading
+
+
+def once(func):
+    """
+    Like ``lru_cache(maxsize=1)`` for zero-argument loaders, but concurrent
+    first callers wait for a single computation instead of each running it.
+    ``cache_clear()`` drops the value so the next call loads it again;
+    ``peek()`` returns it without loading (None if not loaded yet).
+    """
+    lock = threading.Lock()
+    result = []
+
+    @functools.wraps(func)
+    def wrapper():
+        if not result:
+            with lock:
+                if not result:
+                    result.append(func())
+        return result[0]
+
+    def cache_clear():
+        with lock:
+            result.clear()
+
+    def peek():
+        return result[0] if result else None
+
+    wrapper.cache_clear = cache_clear
+    wrapper.peek = peek
+    return wrapper
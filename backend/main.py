@@ -1,20 +1,42 @@
 import os
 import psutil
-from typing import List, Optional
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 from backend.db import db  # ✅ shared DB connection
-from backend.recommendation import recommend
+from backend.embedding import EMBEDDING_BATCH_MAX_SIZE, get_embedding_batcher, get_embedding_cache
+from backend.catalog_sync import CatalogSync
+from backend.executor import BoundedExecutor, ExecutorBusy
+from backend.recommendation import (
+    SYNC_COLLECTIONS,
+    apply_catalog_changes,
+    catalog_manager,
+    data_version,
+    get_program_details,
+    readiness,
+    recommend,
+    recommend_batch,
+    warmup,
+)
+from backend.result_cache import ResultCache, canonical_request
+from backend.singleflight import SingleFlight
 
 def log_memory_usage(note=""):
     process = psutil.Process(os.getpid())
-    mem_mb = process.memory_info().rss / 1024 / 1024
-    print(f"[MEMORY USAGE] {note} {mem_mb:.2f} MB")
+    info = process.memory_info()
+    mem_mb = info.rss / 1024 / 1024
+    # Pages shared with other workers (e.g. memory-mapped catalog vectors) are part of RSS
+    shared = getattr(info, "shared", None)
+    shared_note = f" ({shared / 1024 / 1024:.2f} MB shared)" if shared is not None else ""
+    print(f"[MEMORY USAGE] {note} {mem_mb:.2f} MB{shared_note}")
 
 # Example: log at startup
 log_memory_usage("at startup")
@@ -22,13 +44,82 @@ log_memory_usage("at startup")
 # Load env
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Changes are followed from before the first catalog load, so none slip
+    # in between (re-applying one already loaded is a no-op).
+    if catalog_sync:
+        catalog_sync.start()
+    # 🔥 Warm up in the background so /ready (and other endpoints) answer while
+    # the model and catalog load; /ready turns 200 once everything is warm.
+    if os.getenv("WARMUP_ON_STARTUP", "1") == "1":
+        threading.Thread(target=_warmup_in_background, name="warmup", daemon=True).start()
+    catalog_manager.start_polling(CATALOG_POLL_SECONDS)
+    yield
+    recommend_executor.shutdown()
+
+
+def _warmup_in_background():
+    # Retried with backoff, so one transient failure (e.g. Mongo briefly
+    # unreachable) doesn't leave /ready at 503; /ready reports the last error
+    delay = 1.0
+    while True:
+        try:
+            warmup()
+        except Exception:
+            time.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+            continue
+        log_memory_usage("after warmup")
+        return
+
+
 app = FastAPI(
     title="UniFinder API",
     description="API for UniFinder, providing program recommendations and data.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # --- Configuration ---
+# 🔥 Longest pause between background warmup retries (they back off from 1s)
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "60"))
+
+# 📦 Largest number of answer sets accepted by /search/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+
+# 🧵 CPU-bound recommendation work runs off the event loop in a bounded pool;
+# beyond SEARCH_QUEUE_LIMIT admitted searches, new ones get a 503. With the
+# embedding batcher on, a search spends most of its time parked on a shared
+# encode batch, so the pool is wider: only searches running at once can batch.
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "16" if EMBEDDING_BATCH_MAX_SIZE > 0 else "2"))
+SEARCH_QUEUE_LIMIT = int(os.getenv("SEARCH_QUEUE_LIMIT", "32"))
+recommend_executor = BoundedExecutor(SEARCH_WORKERS, SEARCH_QUEUE_LIMIT, name="recommend")
+
+# ♻️ Cache of /search responses keyed on the canonical request (0 disables it)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "600"))
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL) if RESULT_CACHE_SIZE > 0 else None
+
+# 🤝 Identical searches arriving while one is computing wait for its result
+search_flights = SingleFlight()
+
+# 📚 Catalog hot reload: poll Mongo every CATALOG_POLL_SECONDS (0 = off) and/or
+# POST /catalog/reload with the X-Reload-Token header
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", "0"))
+CATALOG_RELOAD_TOKEN = os.getenv("CATALOG_RELOAD_TOKEN", "")
+
+# 🩹 Incremental catalog sync: follow program/ranking edits and patch only the
+# affected rows. "auto" (change streams, else updated_at polling), "stream",
+# "poll" or "off"; CATALOG_SYNC_SECONDS is the polling interval
+CATALOG_SYNC = os.getenv("CATALOG_SYNC", "off").lower()
+CATALOG_SYNC_SECONDS = float(os.getenv("CATALOG_SYNC_SECONDS", "5"))
+catalog_sync = (
+    CatalogSync(db, SYNC_COLLECTIONS, apply_catalog_changes, CATALOG_SYNC, CATALOG_SYNC_SECONDS)
+    if CATALOG_SYNC != "off"
+    else None
+)
+
 # 🌍 CORS Setup
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 print("ALLOWED_ORIGINS:", ALLOWED_ORIGINS)
@@ -51,11 +142,49 @@ class SearchRequest(BaseModel):
     school_type: str = "any"
     locations: Optional[List[str]] = None
     max_budget: Optional[float] = None
+    min_budget: Optional[float] = None
+    # Programs with unknown tuition ("N/A") pass budget filters unless this is false
+    include_unknown_tuition: bool = True
+    sort_by: Literal["relevance", "tuition_asc", "tuition_desc", "distance"] = "relevance"
+    # Student's position; distances use the bundled campus and town coordinates
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+    radius_km: Optional[float] = Field(None, gt=0)  # only programs within this distance
+    distance_decay_km: Optional[float] = Field(None, gt=0)  # blend closeness into the score
+
+    @model_validator(mode="after")
+    def check_origin(self):
+        if (self.lat is None) != (self.lng is None):
+            raise ValueError("lat and lng must be given together")
+        if self.lat is None and (
+            self.radius_km is not None or self.distance_decay_km is not None or self.sort_by == "distance"
+        ):
+            raise ValueError("radius_km, distance_decay_km and sort_by='distance' need lat and lng")
+        return self
+
+
+class BatchSearchRequest(BaseModel):
+    """
+    Model for the request body of the batch search endpoint: one
+    SearchRequest per student.
+    """
+    requests: List[SearchRequest]
 
 # --- API Endpoints ---
 
+async def _run_recommendation(func, *args, **kwargs):
+    try:
+        return await recommend_executor.run(func, *args, **kwargs)
+    except ExecutorBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many searches in progress. Please try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+
 @app.get("/programs/all", summary="Get all programs from the database")
-async def get_all_programs():
+def get_all_programs():
     try:
         collection = db["all_programs"]
         data = list(collection.find({}, {"_id": 0}))
@@ -65,23 +194,78 @@ async def get_all_programs():
         raise HTTPException(status_code=500, detail="Internal server error while fetching all programs.")
 
 
+def _canonical(request_data):
+    """Canonical ``recommend()`` kwargs and cache key of a SearchRequest."""
+    return canonical_request(
+        request_data.answers,
+        request_data.school_type,
+        request_data.locations,
+        request_data.max_budget,
+        request_data.min_budget,
+        request_data.sort_by,
+        request_data.include_unknown_tuition,
+        request_data.lat,
+        request_data.lng,
+        request_data.radius_km,
+        request_data.distance_decay_km,
+    )
+
+
 @app.post("/search", summary="Get program recommendations based on user answers and filters")
 async def search(request_data: SearchRequest):
-    log_memory_usage("before recommend") 
     print("📥 Received search request")
-    result = recommend(
-        answers=request_data.answers,
-        school_type=request_data.school_type,
-        locations=request_data.locations,
-        max_budget=request_data.max_budget,
-    )
+    kwargs, cache_key = _canonical(request_data)
+
+    # Before warmup the version is unknown, so the cache is bypassed.
+    version = data_version()
+    if result_cache is not None and version is not None:
+        cached = result_cache.get(cache_key, version)
+        if cached is not None:
+            return cached
+
+    return await search_flights.do(cache_key, lambda: _compute_search(kwargs, cache_key))
+
+
+def _recommend_on_snapshot(kwargs):
+    """``recommend()`` result and the version of the snapshot it was computed on."""
+    snapshot = catalog_manager.current()
+    return recommend(**kwargs, snapshot=snapshot), snapshot.version
+
+
+async def _compute_search(kwargs, cache_key):
+    log_memory_usage("before recommend") 
+    result, version = await _run_recommendation(_recommend_on_snapshot, kwargs)
     log_memory_usage("after recommend") 
 
+    # Stored under the version the result was computed with, and only while
+    # that version is still live: a reload that landed meanwhile must not get
+    # this old-catalog result cached (or flip the cache back to the old version).
+    if result_cache is not None and version == data_version():
+        result_cache.put(cache_key, version, result)
     return result
 
 
+@app.post("/search/batch", summary="Get program recommendations for many answer sets at once")
+async def search_batch(batch: BatchSearchRequest):
+    if len(batch.requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(batch.requests)} answer sets (max {MAX_BATCH_SIZE}).",
+        )
+
+    log_memory_usage("before recommend_batch")
+    print(f"📥 Received batch search request ({len(batch.requests)} answer sets)")
+    # Same sanitizing as /search, so one malformed answer set can't fail the batch
+    results = await _run_recommendation(
+        recommend_batch, [_canonical(request)[0] for request in batch.requests]
+    )
+    log_memory_usage("after recommend_batch")
+
+    return {"results": results}
+
+
 @app.get("/programs/from-file", summary="Get program vectors (deprecated or specific use)")
-async def get_programs_from_file():
+def get_programs_from_file():
     try:
         collection = db["program_vectors"]
         data = list(collection.find({}, {"_id": 0}))
@@ -92,7 +276,7 @@ async def get_programs_from_file():
 
 
 @app.get("/api/school-strengths", summary="Get school strengths data")
-async def get_school_strengths():
+def get_school_strengths():
     try:
         collection = db["school_strengths"]
         docs = list(collection.find({}, {"_id": 0}))
@@ -103,7 +287,7 @@ async def get_school_strengths():
 
 
 @app.get("/school-rankings", summary="Get school rankings data")
-async def get_school_rankings():
+def get_school_rankings():
     try:
         collection = db["school_rankings"]
         doc = collection.find_one({}, {"_id": 0})
@@ -114,7 +298,7 @@ async def get_school_rankings():
 
 
 @app.get("/programs/search", summary="Search programs by name, location, or category")
-async def search_programs(
+def search_programs(
     name: Optional[str] = Query(None, max_length=100),
     location: Optional[str] = Query(None, max_length=100),
     category: Optional[str] = Query(None, max_length=100),
@@ -133,3 +317,39 @@ async def search_programs(
     except Exception as e:
         print(f"Error searching programs: {e}")
         raise HTTPException(status_code=500, detail=f"Database error during program search: {e}")
+
+
+@app.post("/catalog/reload", status_code=202, summary="Rebuild the catalog snapshot in the background")
+async def reload_catalog(x_reload_token: Optional[str] = Header(None)):
+    if not CATALOG_RELOAD_TOKEN or x_reload_token != CATALOG_RELOAD_TOKEN:
+        raise HTTPException(status_code=403, detail="Catalog reload is not allowed.")
+
+    started = catalog_manager.request_reload()
+    return {"reload_started": started, "version": catalog_manager.version}
+
+
+@app.get("/ready", summary="Readiness probe: 200 once the model and catalog are warm")
+async def ready():
+    is_ready, error = readiness()
+    if not is_ready:
+        content = {"status": "warming_up"} if error is None else {"status": "error", "detail": error}
+        return JSONResponse(content=content, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/stats", summary="Get cache and executor statistics of this worker")
+async def get_stats():
+    # peek(): /stats runs on the event loop and must never load the model
+    embedding_cache = get_embedding_cache.peek()
+    embedding_batcher = get_embedding_batcher.peek()
+    program_details = get_program_details.peek()
+    return {
+        "catalog": catalog_manager.stats(),
+        "catalog_sync": catalog_sync.stats() if catalog_sync else None,
+        "program_details": program_details.stats() if program_details else None,
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+        "embedding_batcher": embedding_batcher.stats() if embedding_batcher else None,
+        "result_cache": result_cache.stats() if result_cache else None,
+        "search_coalescing": search_flights.stats(),
+        "recommend_executor": recommend_executor.stats(),
+    }
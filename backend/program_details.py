@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ProgramDetails:
+    """
+    Display-only program fields (description, requirements, logo, ...),
+    fetched by ``_id`` for the programs a search actually returns.
+
+    ``fetch(ids)`` returns the documents for ``ids`` (each with its
+    ``_id``). Fetched documents are kept in an LRU of ``max_entries``
+    (0 = fetch every time) for ``ttl`` seconds (0 = until evicted), which
+    also bounds how long a display-only edit takes to show up.
+    """
+
+    def __init__(self, fetch, max_entries, ttl=0):
+        self._fetch = fetch
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # _id -> (document, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+
+    def get_many(self, ids):
+        """``{_id: document}`` for the ``ids`` that still exist."""
+        found = {}
+        missing = []
+        now = time.time()
+        with self._lock:
+            for program_id in dict.fromkeys(ids):
+                cached = self._entries.get(program_id)
+                if cached and not (self.ttl and now - cached[1] > self.ttl):
+                    self._entries.move_to_end(program_id)
+                    found[program_id] = cached[0]
+                    self.hits += 1
+                else:
+                    missing.append(program_id)
+            self.misses += len(missing)
+
+        if missing:
+            fetched = {doc["_id"]: doc for doc in self._fetch(missing)}
+            found.update(fetched)
+            with self._lock:
+                self.fetches += 1
+                if self.max_entries > 0:
+                    for program_id, doc in fetched.items():
+                        self._entries[program_id] = (doc, now)
+                        self._entries.move_to_end(program_id)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return found
+
+    def discard(self, ids):
+        with self._lock:
+            for program_id in ids:
+                self._entries.pop(program_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,56 @@
+# Fixed answer choices offered by the questionnaire in
+# frontend/src/pages/UniFinder.jsx. Keep both lists in sync: choices missing
+# here still work, they are just encoded per request instead of cached.
+QUESTION_CHOICES = {
+    "academics": [
+        "Math",
+        "Science",
+        "English",
+        "History/Social Studies",
+        "Physical Education",
+        "Arts & Design",
+        "Technology/ICT",
+    ],
+    "fields": [
+        "Engineering",
+        "Architecture",
+        "Arts & Media",
+        "Healthcare",
+        "Education",
+        "Community & Social Work",
+        "Law & Governance",
+        "Information Technology",
+    ],
+    "activities": [
+        "Designing/Creating",
+        "Solving complex problems",
+        "Writing/Storytelling",
+        "Hands-on building/Repairing",
+        "Guiding/Mentoring others",
+        "Researching/Analyzing",
+        "Presenting/Speaking",
+    ],
+    "goals": [
+        "Improving lives",
+        "Driving innovation",
+        "Educating others",
+        "Growing a business",
+        "Promoting fairness & justice",
+        "Protecting the environment",
+        "Mastering expertise in a field",
+    ],
+    "environment": [
+        "Corporate office",
+        "Academic institution",
+        "Hospital or clinic",
+        "Outdoor/nature setting",
+        "Workshop or laboratory",
+        "Creative studio",
+        "Tech-driven workspace",
+    ],
+}
+
+
+def all_choices():
+    """Every distinct choice text, in questionnaire order."""
+    return list(dict.fromkeys(choice for choices in QUESTION_CHOICES.values() for choice in choices))
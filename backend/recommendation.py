@@ -1,34 +1,178 @@
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+import time
 import numpy as np
-from functools import lru_cache
 
+from backend.ann import IVFIndex
+from backend.catalog import REQUIRED_FIELDS, SCORING_FIELDS, build_catalog, fingerprint
+from backend.catalog_manager import CatalogManager, CatalogSnapshot
 from backend.db import db  # ✅ shared DB connection
+from backend.embedding import (
+    encode_texts,
+    get_choice_embeddings,
+    get_embedding_batcher,
+    get_embedding_cache,
+    get_model,
+)
+from backend.lazy import once
+from backend.program_details import ProgramDetails
+from backend.snapshot_store import load_snapshot, read_manifest
+from backend.vector_codec import STORAGE_FIELDS, VectorCodec
 
 THRESHOLD = 0.4
 CATEGORY_WEIGHT = 0.3  # weight of the school rating in final score
+ANSWER_KEYS = ["academics", "fields", "activities", "goals", "environment"]
 
+# 🧩 "joined" encodes each key's answers as one sentence; "compositional" averages
+# cached embeddings of the fixed choices and only runs the model on custom text
+ANSWER_ENCODING = os.getenv("ANSWER_ENCODING", "joined").lower()
 
-@lru_cache(maxsize=1)
-def get_model():
-    return SentenceTransformer("all-mpnet-base-v2")
+# 🗜️ How program vectors are read: "float32" (vector lists), "float16" or "int8"
+# (binary payloads written by `python -m backend.compact_vectors`)
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "float32").lower()
 
+# 🔎 Approximate nearest-neighbour (IVF) index, used only for large catalogs
+ANN_INDEX = os.getenv("ANN_INDEX", "ivf").lower()  # "ivf" or "off"
+ANN_MIN_PROGRAMS = int(os.getenv("ANN_MIN_PROGRAMS", "20000"))  # exact scan below this
+ANN_N_LISTS = int(os.getenv("ANN_N_LISTS", "0"))  # 0 = sqrt(programs)
+ANN_N_PROBE = int(os.getenv("ANN_N_PROBE", "16"))  # recall/latency knob
+ANN_MIN_CANDIDATES = int(os.getenv("ANN_MIN_CANDIDATES", "200"))
 
-@lru_cache(maxsize=1)
-def get_program_data():
-    return list(db["program_vectors"].find({}, {"_id": 0}))
+# 💾 Local binary catalog snapshot written by `python -m backend.export_snapshot`.
+# Workers boot from it and fall back to MongoDB when it is missing or stale.
+CATALOG_SNAPSHOT_DIR = os.getenv("CATALOG_SNAPSHOT_DIR", "")
+CATALOG_SNAPSHOT_MAX_AGE = float(os.getenv("CATALOG_SNAPSHOT_MAX_AGE", "86400"))  # seconds, 0 = no limit
+CATALOG_SNAPSHOT_VERIFY = os.getenv("CATALOG_SNAPSHOT_VERIFY", "0") == "1"  # compare with MongoDB first
+# Map the snapshot vectors read-only instead of copying them into each worker
+CATALOG_SNAPSHOT_MMAP = os.getenv("CATALOG_SNAPSHOT_MMAP", "1") == "1"
 
+# 📍 Share of the final score that distance can take away when a search sets
+# distance_decay_km: score *= (1 - W) + W * exp(-distance / distance_decay_km)
+DISTANCE_WEIGHT = float(os.getenv("DISTANCE_WEIGHT", "0.2"))
 
-@lru_cache(maxsize=1)
-def get_rankings_data():
+# 🧾 Display-only fields, fetched from MongoDB just for the programs a search returns
+DISPLAY_FIELDS = (
+    "name",
+    "description",
+    "tuition_annual",
+    "tuition_notes",
+    "admission_requirements",
+    "grade_requirements",
+    "school_requirements",
+    "school_website",
+    "school_logo",
+    "board_passing_rate",
+)
+PROGRAM_DETAILS_CACHE_SIZE = int(os.getenv("PROGRAM_DETAILS_CACHE_SIZE", "4096"))  # 0 = no cache
+PROGRAM_DETAILS_TTL = float(os.getenv("PROGRAM_DETAILS_TTL", "600"))  # seconds, 0 = no expiry
+
+# 🩹 Change-feed batches touching more programs than this, and more than a
+# quarter of the catalog, trigger a full reload instead of a row patch
+SYNC_MAX_PATCH_ROWS = int(os.getenv("CATALOG_SYNC_MAX_PATCH_ROWS", "1000"))
+# Collections the in-memory snapshot is built from. all_programs and
+# school_strengths are served straight from MongoDB, so there is nothing to patch.
+SYNC_COLLECTIONS = ("program_vectors", "school_rankings", "program_vector_meta")
+
+
+_ready = threading.Event()
+_warmup_error = None
+
+
+def warmup():
+    """
+    Load the model and the first catalog snapshot once and run a dummy
+    encode, so the first real search doesn't pay for any of it.
+    Concurrent callers share the same one-time loads.
+    """
+    global _warmup_error
+    try:
+        model = get_model()
+        snapshot = catalog_manager.current()
+        get_embedding_cache()
+        get_embedding_batcher()
+        if ANSWER_ENCODING == "compositional":
+            get_choice_embeddings()
+        model.encode(["warmup"])
+    except Exception as e:
+        _warmup_error = str(e)
+        print(f"❌ Warmup failed: {e}")
+        raise
+
+    _warmup_error = None
+    _ready.set()
+    print(f"✅ Warmup done: {len(snapshot.catalog)} programs loaded")
+
+
+def readiness():
+    """
+    (ready, error) for the readiness probe. Ready once warmup finished, or
+    once searches have loaded the model and catalog themselves (no warmup,
+    or a warmup that failed and is still retrying).
+    """
+    if not _ready.is_set() and get_model.peek() is not None and catalog_manager.peek() is not None:
+        _ready.set()
+    if _ready.is_set():
+        return True, None
+    return False, _warmup_error
+
+
+def get_program_data(projection=None, query=None):
+    return list(db["program_vectors"].find(query or {}, {"_id": 0, **(projection or {})}))
+
+
+def get_vector_codec():
+    if VECTOR_STORAGE == "float32":
+        return None
+
+    meta = db["program_vector_meta"].find_one({"_id": VECTOR_STORAGE})
+    if not meta:
+        raise RuntimeError(
+            f"❌ No '{VECTOR_STORAGE}' vectors found; run `python -m backend.compact_vectors {VECTOR_STORAGE}`"
+        )
+    return VectorCodec.from_document(meta)
+
+
+def load_catalog(ids=None):
+    # Only the scoring fields and one vector representation are read; raw
+    # vectors are dropped after stacking into the matrix. Compact mode never
+    # materializes the 768-float lists at all.
+    codec = get_vector_codec()
+    projection = {field: 1 for field in SCORING_FIELDS}
+    projection[codec.field if codec else "vector"] = 1
+
+    # Required display fields are checked by the query instead of being loaded
+    query = {field: {"$type": "string"} for field in REQUIRED_FIELDS}
+    if ids is not None:
+        query["_id"] = {"$in": list(ids)}
+    return build_catalog(get_program_data(projection, query), codec, required=("school",))
+
+
+def fetch_program_details(ids):
+    return db["program_vectors"].find({"_id": {"$in": ids}}, {field: 1 for field in DISPLAY_FIELDS})
+
+
+@once
+def get_program_details():
+    return ProgramDetails(fetch_program_details, PROGRAM_DETAILS_CACHE_SIZE, PROGRAM_DETAILS_TTL)
+
+
+def load_rankings_data():
     rankings_doc = db["school_rankings"].find_one({}, {"_id": 0})
     return (
         rankings_doc["programs"] if rankings_doc and "programs" in rankings_doc else {}
     )
 
 
-def get_school_rating(school_name, category):
-    rankings_data = get_rankings_data()
+def build_ann_index(catalog):
+    if ANN_INDEX == "off" or len(catalog) < ANN_MIN_PROGRAMS:
+        return None
+
+    n_lists = ANN_N_LISTS or int(np.sqrt(len(catalog)))
+    print(f"🔎 Building IVF index: {len(catalog)} programs in {n_lists} lists")
+    return IVFIndex(catalog.matrix, n_lists)
+
+
+def _match_school_rating(rankings_data, school_name, category):
     ranked_list = rankings_data.get(category, [])
     for school in ranked_list:
         if school_name.lower() in school["school"].lower():
@@ -36,117 +180,391 @@ def get_school_rating(school_name, category):
     return None
 
 
-def recommend(
-    answers: dict,
-    school_type: str = None,
-    locations: list[str] = None,
-    max_budget: float = None,
-):
-    print("\n📊 Starting Program Matching Breakdown")
+def build_rating_table(catalog, rankings_data):
+    """
+    (school, category) -> rating for every program in the catalog, resolved
+    once with the same substring match as the ranking lists.
+    """
+    table = {}
+    for entry in catalog.entries:
+        key = (entry.school, entry.category)
+        if key not in table:
+            table[key] = _match_school_rating(rankings_data, *key)
+    return table
+
+
+def build_rating_prior(catalog, rating_table):
+    """Per-program ``rating / 10 * CATEGORY_WEIGHT`` term of the final score."""
+    return np.array(
+        [
+            (rating_table[(entry.school, entry.category)] or 0) / 10 * CATEGORY_WEIGHT
+            for entry in catalog.entries
+        ],
+        dtype=np.float64,
+    )
+
+
+def assemble_snapshot(catalog, rankings_data, source_fingerprint=None):
+    rating_table = build_rating_table(catalog, rankings_data)
+    return CatalogSnapshot(
+        catalog=catalog,
+        rankings_data=rankings_data,
+        rating_table=rating_table,
+        rating_prior=build_rating_prior(catalog, rating_table),
+        ann_index=build_ann_index(catalog),
+        version=f"{catalog.version}:{fingerprint(rankings_data)}",
+        source_fingerprint=source_fingerprint,
+    )
+
+
+def build_snapshot():
+    snapshot = assemble_snapshot(load_catalog(), load_rankings_data())
+    # A rebuild means the source changed (or a reload was asked for), so
+    # cached display fields go along with the old snapshot.
+    get_program_details().clear()
+    return snapshot
+
+
+def load_local_snapshot():
+    """
+    Snapshot from CATALOG_SNAPSHOT_DIR, or None when there is no usable
+    export (missing, older than CATALOG_SNAPSHOT_MAX_AGE, unreadable, or
+    with CATALOG_SNAPSHOT_VERIFY, out of date with MongoDB).
+    """
+    if not CATALOG_SNAPSHOT_DIR:
+        return None
+
+    manifest = read_manifest(CATALOG_SNAPSHOT_DIR)
+    if manifest is None:
+        print(f"⚠️ No catalog snapshot in {CATALOG_SNAPSHOT_DIR}, loading from MongoDB")
+        return None
+
+    age = time.time() - manifest["created_at"]
+    if CATALOG_SNAPSHOT_MAX_AGE and age > CATALOG_SNAPSHOT_MAX_AGE:
+        print(f"⚠️ Catalog snapshot is {age:.0f}s old, loading from MongoDB")
+        return None
+    if CATALOG_SNAPSHOT_VERIFY and probe_catalog() != manifest["source_fingerprint"]:
+        print("⚠️ Catalog snapshot is out of date, loading from MongoDB")
+        return None
+
+    try:
+        catalog, rankings_data = load_snapshot(CATALOG_SNAPSHOT_DIR, manifest, CATALOG_SNAPSHOT_MMAP)
+    except Exception as e:
+        print(f"⚠️ Catalog snapshot unreadable ({e}), loading from MongoDB")
+        return None
+
+    mode = "memory-mapped" if CATALOG_SNAPSHOT_MMAP else "copied"
+    print(f"💾 Catalog loaded from snapshot {CATALOG_SNAPSHOT_DIR} ({len(catalog)} programs, vectors {mode})")
+    return assemble_snapshot(catalog, rankings_data, manifest["source_fingerprint"])
+
+
+def patch_snapshot(snapshot, program_ids=(), rankings_changed=False):
+    """
+    ``snapshot`` with only the given programs re-read from MongoDB (deleted
+    or now-invalid ones are dropped) and, if ``rankings_changed``, the
+    rankings reloaded. None when nothing actually changed.
+    """
+    catalog, source = snapshot.catalog, None
+    if program_ids:
+        delta = load_catalog(program_ids)
+        removed = set(program_ids) - set(delta.rows)
+        patched = catalog.patched(delta, removed)
+        if patched:
+            catalog, source = patched
+        get_program_details().discard(program_ids)
+
+    rankings_data = load_rankings_data() if rankings_changed else snapshot.rankings_data
+    if source is None and rankings_data == snapshot.rankings_data:
+        return None
+
+    if rankings_changed:
+        rating_table = build_rating_table(catalog, rankings_data)
+        rating_prior = build_rating_prior(catalog, rating_table)
+    else:
+        # Only touched rows need their (school, category) rating resolved
+        rating_table = dict(snapshot.rating_table)
+        rating_prior = np.where(source >= 0, snapshot.rating_prior[np.maximum(source, 0)], 0.0)
+        for row in np.flatnonzero(source < 0):
+            key = (catalog.entries[row].school, catalog.entries[row].category)
+            if key not in rating_table:
+                rating_table[key] = _match_school_rating(rankings_data, *key)
+            rating_prior[row] = (rating_table[key] or 0) / 10 * CATEGORY_WEIGHT
+
+    ann_index = snapshot.ann_index
+    if ann_index is not None and source is not None:
+        ann_index = ann_index.patched(catalog.matrix, source)
+
+    return CatalogSnapshot(
+        catalog=catalog,
+        rankings_data=rankings_data,
+        rating_table=rating_table,
+        rating_prior=rating_prior,
+        ann_index=ann_index,
+        version=f"{catalog.version}:{fingerprint(rankings_data)}",
+        source_fingerprint=snapshot.source_fingerprint,
+    )
+
+
+def apply_catalog_changes(changes):
+    """
+    Apply ``{collection: ids}`` from the change feed (``ids`` None = the
+    whole collection changed). Program and ranking edits patch the live
+    snapshot; anything touching most of the catalog, or the vector codec,
+    falls back to a full reload.
+    """
+    program_ids = changes.get("program_vectors", set())
+    current = catalog_manager.current()
+    if (
+        program_ids is None
+        or "program_vector_meta" in changes
+        or len(program_ids) > max(SYNC_MAX_PATCH_ROWS, len(current.catalog) // 4)
+    ):
+        return catalog_manager.reload()
+
+    try:
+        return catalog_manager.patch(
+            lambda snapshot: patch_snapshot(snapshot, program_ids, "school_rankings" in changes)
+        )
+    except ValueError as e:
+        print(f"⚠️ Catalog patch not possible ({e}), reloading")
+        return catalog_manager.reload()
+
+
+def probe_catalog():
+    """
+    Cheap fingerprint of the source collections (everything but the vector
+    payloads) used by polling to detect changes.
+    """
+    programs = db["program_vectors"].find(
+        {}, {"vector": 0, **{field: 0 for field in STORAGE_FIELDS.values()}}
+    )
+    return fingerprint(
+        [{**doc, "_id": str(doc["_id"])} for doc in programs],
+        db["school_rankings"].find_one({}, {"_id": 0}),
+        db["program_vector_meta"].find_one({"_id": VECTOR_STORAGE}) if VECTOR_STORAGE != "float32" else None,
+    )
+
+
+catalog_manager = CatalogManager(build_snapshot, probe_catalog, load_local_snapshot)
+
+
+def data_version():
+    """
+    Version of the live catalog snapshot, or None before the first load.
+    Never triggers a load, so it is safe on the event loop.
+    """
+    return catalog_manager.version
 
-    # Lazy-load model and data
-    model = get_model()
-    program_data = get_program_data()
-    rankings_data = get_rankings_data()
-
-    # Step 1: Vectorize user answers
-    vectors = {}
-    for key in ["academics", "fields", "activities", "goals", "environment"]:
-        items = answers.get(key, [])
-        custom = answers.get("custom", {}).get(key, "")
-        merged = items + ([custom] if custom.strip() else [])
-        text = " ".join(merged)
-        if text.strip():
-            vec = model.encode(text)
-        else:
-            vec = np.zeros(model.get_sentence_embedding_dimension())
-        vectors[key] = vec
 
-    valid_vectors = [v for v in vectors.values() if np.linalg.norm(v) > 0]
+def _top_k(indices, scores, k):
+    """
+    The ``k`` best of ``indices`` by ``scores``, ordered like a stable
+    descending sort (ties keep catalog order) without sorting every candidate.
+    """
+    if len(indices) > k:
+        values = scores[indices]
+        kth = np.partition(values, len(values) - k)[len(values) - k]
+        above = indices[values > kth]
+        ties = indices[values == kth][: k - len(above)]
+        indices = np.concatenate([above, ties])
+    order = np.lexsort((indices, -scores[indices]))
+    return indices[order]
+
+
+def _result_item(entry, details, score):
+    return {
+        "school": entry.school,
+        "program": details.get("name"),
+        "description": details.get("description"),
+        "score": float(score),
+        "tuition_per_semester": entry.tuition_per_semester,
+        "tuition_annual": details.get("tuition_annual"),
+        "tuition_notes": details.get("tuition_notes"),
+        "admission_requirements": details.get("admission_requirements"),
+        "grade_requirements": details.get("grade_requirements"),
+        "school_requirements": details.get("school_requirements"),
+        "school_website": details.get("school_website"),
+        "school_type": entry.school_type,
+        "location": entry.location,
+        "school_logo": details.get("school_logo"),
+        "board_passing_rate": details.get("board_passing_rate"),
+        "category": entry.category,
+    }
+
+
+def _no_input_response():
+    return {
+        "type": "fallback",
+        "message": "No valid input provided. Please answer at least one question.",
+        "results": [],
+        "weak_matches": [],
+    }
+
+
+def _answer_text(answers, key):
+    items = answers.get(key, [])
+    custom = answers.get("custom", {}).get(key, "")
+    merged = items + ([custom] if custom.strip() else [])
+    return " ".join(merged)
+
+
+def _combine(vectors):
+    """Unit-length mean of the non-zero answer vectors, or None."""
+    valid_vectors = [v for v in vectors if np.linalg.norm(v) > 0]
     if not valid_vectors:
-        return {
-            "type": "fallback",
-            "message": "No valid input provided. Please answer at least one question.",
-            "results": [],
-            "weak_matches": [],
-        }
+        return None
+
+    combined_vector = np.mean(valid_vectors, axis=0).astype(np.float32)
+    norm = np.linalg.norm(combined_vector)
+    if norm > 0:
+        combined_vector /= norm
+    return combined_vector
+
 
-    combined_vector = np.mean(valid_vectors, axis=0).reshape(1, -1)
-
-    # Step 2: Match against programs
-    strong_matches = []
-    weak_matches = []
-
-    for entry in program_data:
-        try:
-            entry_type = entry.get("school_type", "").lower()
-
-            # 🎓 School type filter
-            if school_type and school_type.lower() != "any":
-                if entry_type != school_type.lower():
-                    continue
-
-            # 📍 Location filter
-            if locations:
-                entry_location = entry.get("location", "").lower()
-                if all(loc.lower() not in entry_location for loc in locations):
-                    continue
-
-            # 💰 Budget filter
-            if max_budget is not None:
-                tuition = entry.get("tuition_per_semester")
-                if (
-                    tuition is not None
-                    and isinstance(tuition, (int, float))
-                    and tuition > max_budget
-                ):
-                    continue
-
-            # 📈 Cosine similarity
-            program_vector = np.array(entry["vector"]).reshape(1, -1)
-            similarity_score = cosine_similarity(program_vector, combined_vector)[0][0]
-
-            category = entry.get("category")
-            rating_score = get_school_rating(entry["school"], category) or 0
-            final_score = round(
-                (similarity_score * (1 - CATEGORY_WEIGHT))
-                + (rating_score / 10 * CATEGORY_WEIGHT),
-                3,
+def _search(snapshot, query, mask):
+    """Filtered candidate rows (catalog order) and their similarity to ``query``."""
+    if snapshot.ann_index is not None:
+        return snapshot.ann_index.search(query, mask, ANN_N_PROBE, ANN_MIN_CANDIDATES)
+
+    candidates = np.flatnonzero(mask)
+    return candidates, snapshot.catalog.similarities(query)[candidates]
+
+
+def _encode_answer_sets(model, answer_sets):
+    """
+    Combined query vector per answer set (None when nothing was answered).
+    Every non-empty answer text of every set goes through one ``model.encode``
+    call, so the transformer runs a single batched forward pass.
+    """
+    if ANSWER_ENCODING == "compositional":
+        return _encode_answer_sets_compositional(model, answer_sets)
+
+    texts = []
+    owners = []
+    for position, answers in enumerate(answer_sets):
+        for key in ANSWER_KEYS:
+            text = _answer_text(answers, key)
+            if text.strip():
+                texts.append(text)
+                owners.append(position)
+
+    encoded = encode_texts(model, texts)
+    per_set = [[] for _ in answer_sets]
+    for position, vec in zip(owners, encoded):
+        per_set[position].append(vec)
+
+    return [_combine(vectors) for vectors in per_set]
+
+
+def _encode_answer_sets_compositional(model, answer_sets):
+    """
+    Like ``_encode_answer_sets`` but each key's vector is the mean of its
+    pieces' embeddings: fixed choices come from ``get_choice_embeddings()``
+    and only custom (or unknown) texts are encoded, in one batch. Searches
+    that use only the fixed choices skip model inference entirely.
+    """
+    cached = get_choice_embeddings()
+    pieces_per_set = []
+    pending = {}
+    for answers in answer_sets:
+        pieces_per_key = []
+        for key in ANSWER_KEYS:
+            custom = answers.get("custom", {}).get(key, "")
+            pieces = answers.get(key, []) + ([custom] if custom.strip() else [])
+            pieces = [piece for piece in pieces if piece.strip()]
+            for piece in pieces:
+                if piece not in cached:
+                    pending.setdefault(piece, len(pending))
+            pieces_per_key.append(pieces)
+        pieces_per_set.append(pieces_per_key)
+
+    encoded = encode_texts(model, list(pending))
+
+    def embedding(piece):
+        return cached[piece] if piece in cached else encoded[pending[piece]]
+
+    # Each key's pieces average to one unit vector, so keys weigh the same
+    # as in the joined encoding.
+    return [
+        _combine(
+            key_vector
+            for key_vector in (
+                _combine(embedding(piece) for piece in pieces) for pieces in pieces_per_key
             )
+            if key_vector is not None
+        )
+        for pieces_per_key in pieces_per_set
+    ]
+
+
+def _by_tuition(catalog, candidates, positions, descending):
+    """``positions`` ordered by semester tuition; unknown tuition goes last."""
+    tuition = catalog.tuition[candidates[positions]]
+    return positions[np.argsort(-tuition if descending else tuition, kind="stable")]
+
+
+def _by_distance(distances, positions):
+    """``positions`` nearest first; programs without coordinates go last."""
+    return positions[np.argsort(distances[positions], kind="stable")]
+
 
-            result_item = {
-                "school": entry["school"],
-                "program": entry["name"],
-                "description": entry["description"],
-                "score": final_score,
-                "tuition_per_semester": entry.get("tuition_per_semester"),
-                "tuition_annual": entry.get("tuition_annual"),
-                "tuition_notes": entry.get("tuition_notes"),
-                "admission_requirements": entry.get("admission_requirements"),
-                "grade_requirements": entry.get("grade_requirements"),
-                "school_requirements": entry.get("school_requirements"),
-                "school_website": entry.get("school_website"),
-                "school_type": entry.get("school_type"),
-                "location": entry.get("location"),
-                "school_logo": entry.get("school_logo"),
-                "board_passing_rate": entry.get("board_passing_rate"),
-                "category": category,
-            }
-
-            if similarity_score >= THRESHOLD:
-                strong_matches.append(result_item)
-            else:
-                weak_matches.append(result_item)
-
-        except Exception as e:
-            print(f"⚠️ Skipping invalid entry: {e}")
-            continue
-
-    strong_matches.sort(key=lambda x: x["score"], reverse=True)
-    weak_matches.sort(key=lambda x: x["score"], reverse=True)
+def _near(lat, lng, radius_km):
+    """``filter_mask`` radius filter for a search, or None."""
+    if lat is None or lng is None or radius_km is None:
+        return None
+    return lat, lng, radius_km
+
+
+def _rank(snapshot, candidates, similarities, sort_by="relevance", origin=None, distance_decay_km=None):
+    catalog = snapshot.catalog
+
+    # Final score = weighted similarity + static school rating prior
+    final_scores = similarities * (1 - CATEGORY_WEIGHT) + snapshot.rating_prior[candidates]
+
+    # Distances are computed for the filtered candidates only
+    distances = catalog.distances_km(origin[0], origin[1], candidates) if origin else None
+    if distances is not None and distance_decay_km:
+        # Programs without coordinates get the floor of the decay
+        closeness = np.nan_to_num(np.exp(-distances / distance_decay_km), nan=0.0)
+        final_scores = final_scores * ((1 - DISTANCE_WEIGHT) + DISTANCE_WEIGHT * closeness)
+    final_scores = np.round(final_scores, 3)
+
+    # Keep only the winners; dicts are built for at most k programs each
+    is_strong = similarities >= THRESHOLD
+    strong = _top_k(np.flatnonzero(is_strong), final_scores, 10)
+    weak = _top_k(np.flatnonzero(~is_strong), final_scores, 10 if len(strong) else 12)
+    # Matches are always picked by score; "tuition_asc"/"tuition_desc" only reorder them
+    if sort_by in ("tuition_asc", "tuition_desc"):
+        strong = _by_tuition(catalog, candidates, strong, sort_by == "tuition_desc")
+        weak = _by_tuition(catalog, candidates, weak, sort_by == "tuition_desc")
+    elif sort_by == "distance" and distances is not None:
+        strong = _by_distance(distances, strong)
+        weak = _by_distance(distances, weak)
+
+    # Display fields are fetched for the winners only, in one round trip
+    details = get_program_details().get_many(
+        [catalog.entries[candidates[position]].id for position in (*strong, *weak)]
+    )
+
+    def result_items(positions):
+        items = []
+        for position in positions:
+            entry = catalog.entries[candidates[position]]
+            if entry.id in details:  # gone if deleted since the snapshot was built
+                item = _result_item(entry, details[entry.id], final_scores[position])
+                if distances is not None:
+                    distance = distances[position]
+                    item["distance_km"] = None if np.isnan(distance) else round(float(distance), 1)
+                items.append(item)
+        return items
+
+    strong_matches = result_items(strong)
+    weak_matches = result_items(weak)
 
     top_category = strong_matches[0].get("category") if strong_matches else None
-    top_ranked_schools = rankings_data.get(top_category, [])[:5] if top_category else []
+    top_ranked_schools = (
+        snapshot.rankings_data.get(top_category, [])[:5] if top_category else []
+    )
 
     # Fallback if no strong matches
     if not strong_matches:
@@ -164,8 +582,110 @@ def recommend(
 
     return {
         "type": "exact",
-        "results": strong_matches[:10],
-        "weak_matches": weak_matches[:10],
+        "results": strong_matches,
+        "weak_matches": weak_matches,
         "matched_category": top_category,
         "top_schools_for_category": top_ranked_schools,
     }
+
+
+def recommend(
+    answers: dict,
+    school_type: str = None,
+    locations: list[str] = None,
+    max_budget: float = None,
+    min_budget: float = None,
+    sort_by: str = "relevance",
+    include_unknown_tuition: bool = True,
+    lat: float = None,
+    lng: float = None,
+    radius_km: float = None,
+    distance_decay_km: float = None,
+    snapshot: CatalogSnapshot = None,
+):
+    print("\n📊 Starting Program Matching Breakdown")
+
+    # Lazy-load model and data; the whole search uses this one snapshot
+    # (the caller's, if it needs to know which version answered)
+    model = get_model()
+    if snapshot is None:
+        snapshot = catalog_manager.current()
+
+    # Step 1: Vectorize user answers (one batched encode for every answer text)
+    combined_vector = _encode_answer_sets(model, [answers])[0]
+    if combined_vector is None:
+        return _no_input_response()
+
+    # Step 2: Apply filters as one mask, score the surviving programs, then rank
+    mask = snapshot.catalog.filter_mask(
+        school_type,
+        locations,
+        max_budget,
+        min_budget,
+        include_unknown_tuition,
+        _near(lat, lng, radius_km),
+    )
+    candidates, similarities = _search(snapshot, combined_vector, mask)
+    origin = (lat, lng) if lat is not None and lng is not None else None
+    return _rank(snapshot, candidates, similarities, sort_by, origin, distance_decay_km)
+
+
+def recommend_batch(requests: list[dict]):
+    """
+    Recommend for many answer sets at once. Every non-empty answer text of
+    every request is encoded in one ``model.encode`` batch and all queries
+    are scored against the catalog with a single matrix-matrix product.
+    Each request is a dict with ``answers`` and the optional ``school_type``,
+    ``locations``, ``max_budget``, ``min_budget``, ``include_unknown_tuition``,
+    ``sort_by``, ``lat``, ``lng``, ``radius_km`` and ``distance_decay_km``
+    options of ``recommend()``; results come back in order,
+    each shaped like ``recommend()``'s.
+    """
+    print(f"\n📊 Starting batch matching for {len(requests)} answer sets")
+
+    model = get_model()
+    snapshot = catalog_manager.current()
+    catalog = snapshot.catalog
+
+    # Step 1: Encode every non-empty answer text in one batch
+    queries = _encode_answer_sets(model, [request["answers"] for request in requests])
+    answered = [position for position, query in enumerate(queries) if query is not None]
+
+    # Step 2: Score all answered requests in one mat-mat product (exact scan),
+    # or query the ANN index per request for large catalogs
+    index = snapshot.ann_index
+    if index is None and answered and len(catalog):
+        similarity_matrix = catalog.matrix @ np.stack([queries[p] for p in answered]).T
+    else:
+        similarity_matrix = np.zeros((len(catalog), len(answered)), dtype=np.float32)
+
+    results = [_no_input_response() for _ in requests]
+    for column, position in enumerate(answered):
+        request = requests[position]
+        mask = catalog.filter_mask(
+            request.get("school_type"),
+            request.get("locations"),
+            request.get("max_budget"),
+            request.get("min_budget"),
+            request.get("include_unknown_tuition", True),
+            _near(request.get("lat"), request.get("lng"), request.get("radius_km")),
+        )
+        if index is not None:
+            candidates, similarities = index.search(
+                queries[position], mask, ANN_N_PROBE, ANN_MIN_CANDIDATES
+            )
+        else:
+            candidates = np.flatnonzero(mask)
+            similarities = similarity_matrix[candidates, column]
+        origin = None
+        if request.get("lat") is not None and request.get("lng") is not None:
+            origin = (request["lat"], request["lng"])
+        results[position] = _rank(
+            snapshot,
+            candidates,
+            similarities,
+            request.get("sort_by") or "relevance",
+            origin,
+            request.get("distance_decay_km"),
+        )
+    return results
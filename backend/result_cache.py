@@ -0,0 +1,128 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _clean(text):
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def canonical_request(
+    answers,
+    school_type=None,
+    locations=None,
+    max_budget=None,
+    min_budget=None,
+    sort_by="relevance",
+    include_unknown_tuition=True,
+    lat=None,
+    lng=None,
+    radius_km=None,
+    distance_decay_km=None,
+):
+    """
+    Canonical form of a search: answer choices de-duplicated and sorted,
+    whitespace collapsed, "any"/empty filters dropped. Returns the
+    canonical ``recommend()`` keyword arguments and their hash key; searches
+    that differ only in ordering or whitespace share both.
+    """
+    canonical_answers = {}
+    custom = {}
+    for key, value in answers.items():
+        if key == "custom":
+            for custom_key, text in (value if isinstance(value, dict) else {}).items():
+                if isinstance(text, str) and text.strip():
+                    custom[custom_key] = _clean(text)
+        elif isinstance(value, list):
+            items = sorted({_clean(item) for item in value if isinstance(item, str) and item.strip()})
+            if items:
+                canonical_answers[key] = items
+    canonical_answers["custom"] = custom
+
+    if not school_type or school_type.lower() == "any":
+        school_type = None
+    else:
+        school_type = school_type.lower()
+    if locations:
+        locations = sorted({_clean(location).lower() for location in locations if location.strip(" ,")}) or None
+
+    kwargs = {
+        "answers": canonical_answers,
+        "school_type": school_type,
+        "locations": locations or None,
+        "max_budget": max_budget,
+        "min_budget": min_budget,
+        "sort_by": sort_by or "relevance",
+        "include_unknown_tuition": include_unknown_tuition,
+        "lat": lat,
+        "lng": lng,
+        "radius_km": radius_km,
+        "distance_decay_km": distance_decay_km,
+    }
+    key = hashlib.blake2b(
+        json.dumps(kwargs, sort_keys=True).encode(), digest_size=16
+    ).hexdigest()
+    return kwargs, key
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of search responses. Every entry belongs to a data
+    version (catalog + rankings); the first lookup under a new version
+    drops everything cached for the old one.
+    """
+
+    def __init__(self, max_entries, ttl=0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (result, stored_at)
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        with self._lock:
+            self._check_version(version)
+            cached = self._entries.get(key)
+            if cached and not (self.ttl and time.time() - cached[1] > self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+            if cached:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, version, result):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (result, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
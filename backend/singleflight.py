@@ -0,0 +1,35 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: while one call for a key runs,
+    later callers with the same key await its result instead of starting
+    their own. Runs on the event loop only, so it needs no locking.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, func):
+        """Result of ``await func()``, shared by all concurrent callers of ``key``."""
+        future = self._calls.get(key)
+        if future is None:
+            self.leaders += 1
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        # Shielded so one caller disconnecting doesn't cancel the others' result.
+        return await asyncio.shield(future)
+
+    def stats(self):
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,115 @@
+import gzip
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from bson import json_util
+
+from backend.catalog import SCORING_FIELDS, Catalog, Program
+
+SNAPSHOT_FORMAT = 6  # bumped when the stored fields or layout change; older exports are ignored
+VECTORS_FILE = "vectors.npy"
+METADATA_FILE = "metadata.json.gz"
+MANIFEST_FILE = "manifest.json"
+DATA_DIR_PREFIX = "data-"
+# Exports kept on disk: the live one plus the previous, which workers that
+# read the old manifest a moment ago may still be opening
+KEEP_EXPORTS = 2
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def export_snapshot(directory, catalog, rankings_data, source_fingerprint=None):
+    """
+    Write ``catalog`` and ``rankings_data`` to ``directory``: the normalized
+    float32 matrix as ``vectors.npy`` and the scoring fields as gzipped
+    columnar JSON (one list per field). Each export goes to a new
+    ``data-*`` subdirectory and ``manifest.json`` is then swapped to point
+    at it, so the manifest is the single atomic switch: a reader always
+    gets vectors and metadata of the same export, and workers still mapping
+    older vectors keep reading them intact.
+    """
+    created_at = time.time()
+    data_dir = f"{DATA_DIR_PREFIX}{int(created_at * 1000)}-{catalog.version}"
+    data_path = os.path.join(directory, data_dir)
+    os.makedirs(data_path)
+
+    documents = [entry.to_document() for entry in catalog.entries]
+    columns = {field: [doc[field] for doc in documents] for field in SCORING_FIELDS}
+    # json_util keeps ObjectId program keys intact across the round trip
+    metadata = json_util.dumps(
+        {"columns": columns, "rankings": rankings_data}, separators=(",", ":")
+    ).encode()
+
+    _write_atomic(
+        os.path.join(data_path, VECTORS_FILE),
+        lambda f: np.save(f, np.ascontiguousarray(catalog.matrix, dtype=np.float32)),
+    )
+    _write_atomic(os.path.join(data_path, METADATA_FILE), lambda f: f.write(gzip.compress(metadata)))
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "data_dir": data_dir,
+        "catalog_version": catalog.version,
+        "source_fingerprint": source_fingerprint,
+        "programs": len(catalog),
+        "dimension": int(catalog.matrix.shape[1]) if len(catalog) else 0,
+        "created_at": created_at,
+    }
+    _write_atomic(
+        os.path.join(directory, MANIFEST_FILE), lambda f: f.write(json.dumps(manifest, indent=2).encode())
+    )
+    _prune_exports(directory, data_dir)
+    return manifest
+
+
+def _prune_exports(directory, current):
+    """Remove all but the newest KEEP_EXPORTS data directories (never ``current``)."""
+    exports = sorted(
+        (name for name in os.listdir(directory) if name.startswith(DATA_DIR_PREFIX)),
+        key=lambda name: int(name[len(DATA_DIR_PREFIX) :].split("-")[0]),
+    )
+    for name in exports[:-KEEP_EXPORTS]:
+        if name != current:
+            # Mapped vectors stay readable after the unlink until unmapped
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == SNAPSHOT_FORMAT else None
+
+
+def load_snapshot(directory, manifest, mmap=False):
+    """
+    (catalog, rankings_data) of the export ``manifest`` points to in
+    ``directory``. With ``mmap`` the vectors stay a read-only memory map of
+    ``vectors.npy``, so every worker on the node shares one copy through
+    the page cache.
+    """
+    data_path = os.path.join(directory, manifest["data_dir"])
+    matrix = np.load(os.path.join(data_path, VECTORS_FILE), mmap_mode="r" if mmap else None)
+    with open(os.path.join(data_path, METADATA_FILE), "rb") as f:
+        metadata = json_util.loads(gzip.decompress(f.read()))
+
+    columns = metadata["columns"]
+    entries = [
+        Program.from_document(dict(zip(SCORING_FIELDS, row)))
+        for row in zip(*(columns[field] for field in SCORING_FIELDS))
+    ]
+    if len(matrix) != len(entries):
+        raise ValueError(f"Snapshot has {len(matrix)} vectors for {len(entries)} programs")
+
+    catalog = Catalog(entries, matrix, version=manifest["catalog_version"])
+    return catalog, metadata["rankings"]
@@ -0,0 +1,72 @@
+import numpy as np
+
+# Mongo field holding each program's compact vector, per storage mode.
+STORAGE_FIELDS = {"float16": "vector_f16", "int8": "vector_i8"}
+STORAGE_DTYPES = {"float16": np.dtype("<f2"), "int8": np.dtype("i1")}
+
+
+class VectorCodec:
+    """
+    Compact binary encoding of program vectors.
+
+    ``float16`` halves every float; ``int8`` is scalar quantization with one
+    scale per dimension (``x ≈ q * scale``), shared by the whole catalog and
+    stored once in the ``program_vector_meta`` collection. Vectors are
+    L2-normalized before encoding, since only their direction is scored.
+    """
+
+    def __init__(self, storage, dimension, scale=None):
+        if storage not in STORAGE_FIELDS:
+            raise ValueError(f"Unknown vector storage '{storage}'")
+        if storage == "int8" and scale is None:
+            raise ValueError("int8 vector storage needs a per-dimension scale")
+
+        self.storage = storage
+        self.dimension = dimension
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+
+    @property
+    def field(self):
+        return STORAGE_FIELDS[self.storage]
+
+    @property
+    def row_bytes(self):
+        return self.dimension * STORAGE_DTYPES[self.storage].itemsize
+
+    @classmethod
+    def fit(cls, storage, matrix):
+        """Codec for ``matrix`` (rows already L2-normalized)."""
+        scale = None
+        if storage == "int8":
+            scale = np.abs(matrix).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+        return cls(storage, matrix.shape[1], scale)
+
+    def encode(self, matrix):
+        """One ``bytes`` payload per row."""
+        if self.storage == "int8":
+            quantized = np.clip(np.rint(matrix / self.scale), -127, 127).astype("i1")
+        else:
+            quantized = matrix.astype("<f2")
+        return [row.tobytes() for row in quantized]
+
+    def decode(self, payloads):
+        """Stack row payloads straight into a float32 matrix."""
+        flat = np.frombuffer(b"".join(payloads), dtype=STORAGE_DTYPES[self.storage])
+        matrix = flat.reshape(len(payloads), self.dimension).astype(np.float32)
+        if self.scale is not None:
+            matrix *= self.scale
+        return matrix
+
+    def to_document(self):
+        doc = {"_id": self.storage, "storage": self.storage, "dimension": self.dimension}
+        if self.scale is not None:
+            doc["scale"] = self.scale.astype("<f4").tobytes()
+        return doc
+
+    @classmethod
+    def from_document(cls, doc):
+        scale = doc.get("scale")
+        if scale is not None:
+            scale = np.frombuffer(scale, dtype="<f4")
+        return cls(doc["storage"], doc["dimension"], scale)